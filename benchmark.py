@@ -0,0 +1,84 @@
+"""
+Замер времени чтения и расшифровки файла ТОПАЗ.
+Записи исходного файла повторяются до заданного числа записей (временный файл), для каждого этапа
+выводится лучшее время из нескольких повторов.
+
+Запуск из командной строки (20 000 записей, параллельная расшифровка в 1 и 4 процессах):
+python3 benchmark.py input/initial_state --records 20000 --workers 1 4
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import tempfile
+import time
+from typing import Callable
+
+from constants import CHUNK_SIZE
+from topaz_file_handler import decode_real48_columns, decode_tvs_pool, decode_tvs_pool_parallel, read_topaz
+
+
+def make_pool_file(source: str, records: int, chunk_size: int, file_path: str):
+    """
+    Записывает файл ТОПАЗ из `records` записей, повторяя записи файла `source`
+    """
+    with open(source, "rb") as file:
+        data = file.read()
+    source_records = len(data) // chunk_size
+    if source_records == 0:
+        raise ValueError(f"В файле `{source}` нет ни одной записи")
+    data = data[:source_records * chunk_size]
+    with open(file_path, "wb") as file:
+        for _ in range(records // source_records):
+            file.write(data)
+        file.write(data[:records % source_records * chunk_size])
+
+
+def best_time(function: Callable, repeat: int = 3) -> (float, object):
+    """
+    Лучшее время выполнения функции из `repeat` повторов (вывод функции подавляется)
+    :return: время, с; результат последнего выполнения
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        # результат предыдущего повтора освобождается до замера
+        result = None
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = function()
+            times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Замер времени чтения и расшифровки файла ТОПАЗ")
+    parser.add_argument("source", help="файл ТОПАЗ, записи которого повторяются")
+    parser.add_argument("--records", type=int, default=20000, help="число записей (по умолчанию - 20000)")
+    parser.add_argument("--workers", type=int, nargs="*", default=[],
+                        help="числа процессов для замера параллельной расшифровки")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool_file = os.path.join(tmp_dir, "initial_state")
+        make_pool_file(args.source, args.records, CHUNK_SIZE, pool_file)
+
+        # каждый замер - на заново считанных записях: поля K кэшируются в записи при первом обращении
+        read_time, (_, raw_pool) = best_time(lambda: read_topaz(pool_file, CHUNK_SIZE))
+        columns_time, _ = best_time(lambda: decode_real48_columns(read_topaz(pool_file, CHUNK_SIZE)[1]))
+        total_time, _ = best_time(lambda: decode_tvs_pool(read_topaz(pool_file, CHUNK_SIZE)[1]))
+        lazy_time, _ = best_time(lambda: decode_tvs_pool(read_topaz(pool_file, CHUNK_SIZE)[1], lazy=True))
+
+        print(f"Записей: {len(raw_pool)}")
+        print(f"Чтение (read_topaz): {read_time:.3f} с")
+        print(f"Чтение и поля Real48 (decode_real48_columns): {columns_time:.3f} с")
+        print(f"Чтение и расшифровка (decode_tvs_pool): {total_time:.3f} с")
+        print(f"Чтение и ленивая расшифровка (decode_tvs_pool, lazy=True): {lazy_time:.3f} с")
+        for workers in args.workers:
+            parallel_time, _ = best_time(
+                lambda: decode_tvs_pool_parallel(pool_file, CHUNK_SIZE, workers=workers), repeat=2
+            )
+            print(f"Параллельная расшифровка ({workers} проц.): {parallel_time:.3f} с")
@@ -0,0 +1,58 @@
+"""
+В данном модуле представлены методы дискового кэша расшифрованных данных.
+Кэш хранится в отдельном файле (рядом с исходным) и привязан к ключу: хэшу содержимого исходных файлов
+и параметрам расшифровки. При несовпадении ключа кэш считается устаревшим и перестраивается.
+"""
+import hashlib
+import os
+import pickle
+
+# версия формата кэша: увеличивается при изменении кэшируемых классов, чтобы старые кэши не загружались
+CACHE_VERSION = 1
+
+
+def file_digest(file_path: str) -> str:
+    """
+    Вычисляет хэш содержимого файла
+    :param file_path: путь к файлу
+    :return: sha256 в шестнадцатеричном виде
+    """
+    with open(file_path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def load_cache(cache_path: str, key: tuple):
+    """
+    Загружает данные из файла кэша, если ключ кэша совпадает с переданным
+    :param cache_path: расположение файла кэша
+    :param key: ключ (хэши исходных файлов и параметры расшифровки)
+    :return: сохраненные данные или None, если кэша нет, он устарел или поврежден
+    """
+    try:
+        with open(cache_path, "rb") as file:
+            cached_key, payload = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        print(f"Файл кэша `{cache_path}` поврежден и будет перестроен ({exc}).")
+        return None
+    if cached_key != (CACHE_VERSION, key):
+        return None
+    return payload
+
+
+def save_cache(cache_path: str, key: tuple, payload):
+    """
+    Сохраняет данные в файл кэша (через временный файл, чтобы не оставлять недописанный кэш)
+    :param cache_path: расположение файла кэша
+    :param key: ключ (хэши исходных файлов и параметры расшифровки)
+    :param payload: сохраняемые данные
+    :return: None
+    """
+    tmp_cache_path = f"{cache_path}.tmp"
+    try:
+        with open(tmp_cache_path, "wb") as file:
+            pickle.dump(((CACHE_VERSION, key), payload), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_cache_path, cache_path)
+    except OSError as exc:
+        print(f"Не удалось сохранить кэш `{cache_path}`: {exc}")
@@ -1,12 +1,42 @@
 # ------------------------------------TOPAZ classes---------------------------------------------------------------------
 # Здесь представлены классы и методы для представления сущностей БД ТОПАЗа ПОБАЙТОВО:
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Mapping, Optional
 
-from constants import DATE_FORMAT, EXPOSURE_DAYS
+from constants import DATE_FORMAT, EXPOSURE_DAYS, SECTION_BY_MOST
+from heat_engine import HeatCurve, get_heat_curve
 from services import parse_real48
 
 
+class chunk_field:
+    """
+    Поле структуры ТОПАЗ: срез буфера записи без копирования (memoryview).
+    Срез вычисляется при каждом обращении к полю и не кэшируется: почти все поля читаются при расшифровке
+    один-два раза, а кэш в __dict__ экземпляра (словарь и memoryview на каждое поле каждой записи) замедляет
+    чтение и расшифровку 20 000 записей примерно в 1.5 раза (см. benchmark.py). Повторно используемые поля
+    читаются в локальную переменную в месте использования.
+    Если задан struct - при первом обращении создается вложенная структура, которая кэшируется в экземпляре.
+    """
+
+    def __init__(self, start: int, end: Optional[int] = None, struct: Optional[type] = None):
+        self.start = start
+        self.end = end
+        self.struct = struct
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance.chunk[self.start:self.end]
+        if self.struct is not None:
+            value = self.struct(value)
+            instance.__dict__[self.name] = value
+        return value
+
+
 class tp:
     """
     TOTAL - 26 bytes
@@ -17,14 +47,16 @@ class tp:
     indeks: string[3] - 4 bytes
     """
 
-    def __init__(self, chunk: bytes):
-        # не декодируем на этой стороне, только считываем
-        self.sort = chunk[0:11]
-        self.nomer = chunk[11:22]
-        self.indeks = chunk[22:26]
+    # не декодируем на этой стороне, только считываем
+    sort = chunk_field(0, 11)
+    nomer = chunk_field(11, 22)
+    indeks = chunk_field(22, 26)
+
+    def __init__(self, chunk):
+        self.chunk = memoryview(chunk)
 
     def __repr__(self):
-        return f"{self.sort} + {self.nomer} + {self.indeks}"
+        return f"{bytes(self.sort)} + {bytes(self.nomer)} + {bytes(self.indeks)}"
 
 
 class his_sp:
@@ -67,35 +99,37 @@ class sp:
     contCP: string[34] - 35 bytes
     """
 
+    nomer = chunk_field(0, 11)
+    ty = chunk_field(11, 42)
+    cher = chunk_field(42, 73)
+    otr_cam = chunk_field(73, 74)
+    teff = chunk_field(74, 80)
+    max_timeAZ = chunk_field(80, 82)
+    max_timerr = chunk_field(82, 84)
+    h_cp = chunk_field(84, 504)
+    datain = chunk_field(504, 515)
+    dataout = chunk_field(515, 526)
+    dataotpr = chunk_field(526, 537)
+    Teff_az = chunk_field(537, 541)
+    Teff_rr = chunk_field(541, 545)
+    ostatok_AZ = chunk_field(545, 551)
+    ostatok_RR = chunk_field(551, 557)
+    contCP = chunk_field(557, 592)
+
     def __init__(self, chunk):
-        self.nomer = chunk[0:11]
-        self.ty = chunk[11:42]
-        self.cher = chunk[42:73]
-        self.otr_cam = chunk[73:74]
-        self.teff = chunk[74:80]
-        self.max_timeAZ = chunk[80:82]
-        self.max_timerr = chunk[82:84]
-        self.h_cp = chunk[84:504]
-        self.datain = chunk[504:515]
-        self.dataout = chunk[515:526]
-        self.dataotpr = chunk[526:537]
-        self.Teff_az = chunk[537:541]
-        self.Teff_rr = chunk[541:545]
-        self.ostatok_AZ = chunk[545:551]
-        self.ostatok_RR = chunk[551:557]
-        self.contCP = chunk[557:592]
+        self.chunk = memoryview(chunk)
 
     def __repr__(self):
-        return (f"nomer: {self.nomer} "
-                f"\n ty: {self.ty} "
-                f"\n cher: {self.cher}")
+        return (f"nomer: {bytes(self.nomer)} "
+                f"\n ty: {bytes(self.ty)} "
+                f"\n cher: {bytes(self.cher)}")
 
     def encode(self):
         """
         Возвращает байтовую форму полей класса
         :return:
         """
-        return b"".join(self.__dict__.values())
+        return bytes(self.chunk)
 
 
 class k_mass:
@@ -106,14 +140,14 @@ class k_mass:
     aktiv: real48 - 6 bytes
     """
 
-    def __init__(self, chunk):
-        ost_aktiv_chunk_size = 6
+    ost = chunk_field(0, 6)
+    aktiv = chunk_field(6, 12)
 
-        self.ost = chunk[0:ost_aktiv_chunk_size]
-        self.aktiv = chunk[ost_aktiv_chunk_size:]
+    def __init__(self, chunk):
+        self.chunk = memoryview(chunk)
 
     def __repr__(self):
-        return f"ost: {self.ost}, aktiv: {self.aktiv}"
+        return f"ost: {bytes(self.ost)}, aktiv: {bytes(self.aktiv)}"
 
 
 class aktiv_OE:
@@ -127,9 +161,10 @@ class aktiv_OE:
         k_mass_size = 12
         k_mass_count = 14
 
+        self.chunk = memoryview(chunk)
         starts = [i * k_mass_size for i in range(k_mass_count)]
         ends = [s + k_mass_size for s in starts]
-        self.aktiv_OE = [k_mass(chunk[s:e]) for s, e in zip(starts, ends)]
+        self.aktiv_OE = [k_mass(self.chunk[s:e]) for s, e in zip(starts, ends)]
 
     def __repr__(self):
         return self.aktiv_OE
@@ -151,17 +186,19 @@ class kamNew:
     tel: byte - 1 byte
     """
 
+    n_kamp = chunk_field(0, 1)
+    bgn_kam = chunk_field(1, 12)
+    end_kam = chunk_field(12, 23)
+    cp = chunk_field(23, 34)
+    shl_end = chunk_field(34, 40)
+    teff = chunk_field(40, 46)
+    rn = chunk_field(46, 47)
+    n360 = chunk_field(47, 48)
+    most = chunk_field(48, 49)
+    tel = chunk_field(49, 50)
+
     def __init__(self, chunk):
-        self.n_kamp = chunk[0:1]
-        self.bgn_kam = chunk[1:12]
-        self.end_kam = chunk[12: 23]
-        self.cp = chunk[23: 34]
-        self.shl_end = chunk[34: 40]
-        self.teff = chunk[40: 46]
-        self.rn = chunk[46:47]
-        self.n360 = chunk[47:48]
-        self.most = chunk[48:49]
-        self.tel = chunk[49:50]
+        self.chunk = memoryview(chunk)
 
 
 class hagNew:
@@ -185,17 +222,16 @@ class hNew:
     peremec: array[0..13] of hagNew - 169 bytes
     """
 
+    peremec = chunk_field(250)  # пока не реализуем, т.к. не понадобилось
+
     def __init__(self, chunk):
-        kamp_size = 250
         kamNew_size = 50
         kamNew_count = 5
 
-        self.peremec = chunk[kamp_size:]  # пока не реализуем, т.к. не понадобилось
-        kamp_chunk = chunk[0:kamp_size]
-
+        self.chunk = memoryview(chunk)
         starts = [i * kamNew_size for i in range(kamNew_count)]
         ends = [s + kamNew_size for s in starts]
-        self.kamp = [kamNew(kamp_chunk[s:e]) for s, e in zip(starts, ends)]
+        self.kamp = [kamNew(self.chunk[s:e]) for s, e in zip(starts, ends)]
 
 
 class K:
@@ -251,66 +287,163 @@ class K:
         задокумментированный размер экземпляра K - 1686 b, фактический размер - 1749 b.
     """
 
+    tip = chunk_field(0, 27, tp)
+    cp = chunk_field(26, 618, sp)
+    k_OE_akt = chunk_field(618, 786, aktiv_OE)
+    mesto = chunk_field(786, 791)
+    way = chunk_field(791, 793)
+    ty = chunk_field(793, 824)
+    cher = chunk_field(824, 855)
+    datap = chunk_field(855, 866)
+    datapr = chunk_field(866, 877)
+    datin = chunk_field(877, 888)
+    datout = chunk_field(888, 899)
+    dataotp = chunk_field(899, 910)
+    shlak = chunk_field(910, 916)
+    most = chunk_field(916, 917)
+    tel = chunk_field(917, 918)
+    n360 = chunk_field(918, 919)
+    rn = chunk_field(919, 920)
+    otrkam = chunk_field(920, 921)
+    potrkam = chunk_field(921, 922)
+    uo2 = chunk_field(922, 928)
+    u85 = chunk_field(928, 934)
+    u5c = chunk_field(934, 940)
+    u5 = chunk_field(940, 946)
+    u6 = chunk_field(946, 952)
+    u8 = chunk_field(952, 958)
+    p8 = chunk_field(958, 964)
+    p9 = chunk_field(964, 970)
+    p0 = chunk_field(970, 976)
+    p1 = chunk_field(976, 982)
+    p2 = chunk_field(982, 988)
+    gdo = chunk_field(988, 994)
+    ost_ev = chunk_field(994, 1000)
+    metka = chunk_field(1000, 1011)
+    history = chunk_field(1011, 1430, hNew)
+    postavcik = chunk_field(1430, 1453)
+    poluchatel = chunk_field(1453, 1473)
+    data_vh_k = chunk_field(1473, 1493)
+    nom_tuk = chunk_field(1493, 1513)
+    nakladnay = chunk_field(1513, 1585)
+    kod_sob = chunk_field(1585, 1586)
+    mesto_tyk = chunk_field(1586, 1587)
+    naklanday_out = chunk_field(1587, 1637)
+    aktiv = chunk_field(1637, 1643)
+    dat_ras_akt = chunk_field(1643, 1654)
+    contekst = chunk_field(1654, 1686)
+    tail = chunk_field(1686)
+
     def __init__(self, chunk):
-        self.tip = tp(chunk[0:27])
-        self.cp = sp(chunk[26:618])
-        self.k_OE_akt = aktiv_OE(chunk[618:786])
-        self.mesto = chunk[786:791]
-        self.way = chunk[791:793]
-        self.ty = chunk[793:824]
-        self.cher = chunk[824:855]
-        self.datap = chunk[855:866]
-        self.datapr = chunk[866:877]
-        self.datin = chunk[877:888]
-        self.datout = chunk[888:899]
-        self.dataotp = chunk[899:910]
-        self.shlak = chunk[910:916]
-        self.most = chunk[916:917]
-        self.tel = chunk[917:918]
-        self.n360 = chunk[918:919]
-        self.rn = chunk[919:920]
-        self.otrkam = chunk[920:921]
-        self.potrkam = chunk[921:922]
-        self.uo2 = chunk[922:928]
-        self.u85 = chunk[928:934]
-        self.u5c = chunk[934:940]
-        self.u5 = chunk[940:946]
-        self.u6 = chunk[946:952]
-        self.u8 = chunk[952:958]
-        self.p8 = chunk[958:964]
-        self.p9 = chunk[964:970]
-        self.p0 = chunk[970:976]
-        self.p1 = chunk[976:982]
-        self.p2 = chunk[982:988]
-        self.gdo = chunk[988:994]
-        self.ost_ev = chunk[994:1000]
-        self.metka = chunk[1000:1011]
-        self.history = hNew(chunk[1011:1430])
-        self.postavcik = chunk[1430:1453]
-        self.poluchatel = chunk[1453:1473]
-        self.data_vh_k = chunk[1473:1493]
-        self.nom_tuk = chunk[1493:1513]
-        self.nakladnay = chunk[1513:1585]
-        self.kod_sob = chunk[1585:1586]
-        self.mesto_tyk = chunk[1586:1587]
-        self.naklanday_out = chunk[1587:1637]
-        self.aktiv = chunk[1637:1643]
-        self.dat_ras_akt = chunk[1643:1654]
-        self.contekst = chunk[1654:1686]
-        self.tail = chunk[1686:]
+        # запись не копируется: все поля - срезы (memoryview) исходного буфера
+        self.chunk = memoryview(chunk)
 
     def __repr__(self):
-        return f"ТВС: {self.tip}; ПС: {self.cp.nomer}; coord: {self.most}-{self.tel}; out: {self.datout}"
+        return (f"ТВС: {self.tip}; ПС: {bytes(self.cp.nomer)}; "
+                f"coord: {self.most[0]}-{self.tel[0]}; out: {bytes(self.datout)}")
+
+
+# Раскладка полей Real48 записи K: имя поля - смещение от начала записи.
+# Массивы структур развернуты поэлементно: ost0..ost13 / aktiv0..aktiv13 - k_OE_akt,
+# shl_end0..shl_end4 / teff0..teff4 - кампании истории ТВС (history.kamp)
+K_REAL48_LAYOUT: dict[str, int] = {
+    "cp_teff": 26 + 74,
+    "ostatok_AZ": 26 + 545,
+    "ostatok_RR": 26 + 551,
+    **{f"{name}{i}": 618 + i * 12 + shift for i in range(14) for name, shift in (("ost", 0), ("aktiv", 6))},
+    "shlak": 910,
+    "uo2": 922,
+    "u85": 928,
+    "u5c": 934,
+    "u5": 940,
+    "u6": 946,
+    "u8": 952,
+    "p8": 958,
+    "p9": 964,
+    "p0": 970,
+    "p1": 976,
+    "p2": 982,
+    "gdo": 988,
+    "ost_ev": 994,
+    **{f"{name}{j}": 1011 + j * 50 + shift for j in range(5) for name, shift in (("shl_end", 34), ("teff", 40))},
+    "aktiv": 1637,
+}
+OST_FIELDS = tuple(f"ost{i}" for i in range(14))
+AKTIV_FIELDS = tuple(f"aktiv{i}" for i in range(14))
+
+
+class Real48Fields:
+    """
+    Побайтовая расшифровка полей Real48 записи K по раскладке K_REAL48_LAYOUT.
+    Используется, когда пакетная расшифровка пула (topaz_file_handler.decode_real48_columns) не передана.
+    """
+
+    def __init__(self, k: K):
+        self.chunk = k.chunk
+
+    def __getitem__(self, name: str) -> float:
+        offset = K_REAL48_LAYOUT[name]
+        return parse_real48(self.chunk[offset:offset + 6])
 
 
 # ------------------------------------end of section TOPAZ classes------------------------------------------------------
 
+# незаполненная строка даты string[10] (кампания отсутствует)
+EMPTY_DATE = bytes(11)
+
+
+class lazy_field:
+    """
+    Поле ТВС, расшифровываемое из записи K при первом обращении (ленивый режим TVS).
+    Значение сохраняется в __dict__ экземпляра; дескриптор без __set__, поэтому следующие обращения - обычный
+    атрибут. В отличие от functools.cached_property не берет блокировку при первом обращении (Python 3.11).
+    В обычном режиме TVS поля расшифровываются сразу, функцией поля (без обращения через дескриптор).
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.func(instance)
+        return value
+
+
+def real48_field(name: str) -> lazy_field:
+    """Поле Real48 записи K (имя из K_REAL48_LAYOUT), расшифровываемое при первом обращении к атрибуту TVS"""
+    return lazy_field(lambda self: self.real48[name])
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text: str) -> Optional[datetime]:
+    """
+    Разбирает дату ТОПАЗ (DATE_FORMAT); None - строка не является датой.
+    Даты в пуле повторяются (общие даты кампаний), поэтому результат кэшируется
+    """
+    try:
+        return datetime.strptime(text, DATE_FORMAT)
+    except ValueError:
+        return None
+
+
 class Campaign:
     """
     Содержит описание топливной кампании из истории перемещений ТВС
     """
 
-    def __init__(self, kam_new: kamNew, codepage: str):
+    def __init__(
+            self,
+            kam_new: kamNew,
+            codepage: str,
+            burn_end: Optional[float] = None,
+            t_eff: Optional[float] = None
+    ):
         """
         number: порядковый номер кампании ???
         begin: начало кампании
@@ -322,28 +455,28 @@ class Campaign:
         n360: номер в симмтрии 360
         most: мост
         tel: телега
+
+        burn_end и t_eff могут быть переданы уже расшифрованными (пакетная расшифровка Real48)
         """
-        len_bgn_kam = int(kam_new.bgn_kam[0])
-        len_end_kam = int(kam_new.end_kam[0])
-        len_cp = int(kam_new.end_kam[0])
+        bgn_kam = kam_new.bgn_kam
+        end_kam = kam_new.end_kam
+        len_bgn_kam = int(bgn_kam[0])
+        len_end_kam = int(end_kam[0])
+        len_cp = int(end_kam[0])
 
         self.number = kam_new.n_kamp[0]
 
-        begin = kam_new.bgn_kam[1:len_bgn_kam + 1].decode(codepage)
-        try:
-            self.begin = datetime.strptime(begin, DATE_FORMAT)
-        except ValueError:
-            pass
+        begin = parse_date(str(bgn_kam[1:len_bgn_kam + 1], codepage))
+        if begin is not None:
+            self.begin = begin
 
-        end = kam_new.end_kam[1:len_end_kam + 1].decode(codepage)
-        try:
-            self.end = datetime.strptime(end, DATE_FORMAT)
-        except ValueError:
-            pass
+        end = parse_date(str(end_kam[1:len_end_kam + 1], codepage))
+        if end is not None:
+            self.end = end
 
-        self.ar = None if len_cp == 0 else kam_new.cp[1: len_cp + 1].decode(codepage)
-        self.burn_end = parse_real48(kam_new.shl_end)
-        self.t_eff = parse_real48(kam_new.teff)
+        self.ar = None if len_cp == 0 else str(kam_new.cp[1: len_cp + 1], codepage)
+        self.burn_end = parse_real48(kam_new.shl_end) if burn_end is None else burn_end
+        self.t_eff = parse_real48(kam_new.teff) if t_eff is None else t_eff
         self.rn = kam_new.rn[0]
         self.n360 = kam_new.n360[0]
         self.most = kam_new.most[0]
@@ -371,74 +504,189 @@ class TVS:
     heat: тепловыделение ТВС
     """
 
-    def __init__(self, k: K, codepage: str, date: Optional[datetime] = None):
-        # задаем границы жестко
-        len_sort = int(k.tip.sort[0])
-        len_nomer = int(k.tip.nomer[0])
-        len_indeks = int(k.tip.indeks[0])
-
-        sort = k.tip.sort[1:len_sort + 1].decode(codepage)
-        nomer = k.tip.nomer[1:len_nomer + 1].decode(codepage)
-        indeks = k.tip.indeks[1:len_indeks + 1].decode(codepage)
-
-        self.number = sort + nomer + indeks
-
-        len_ar = int(k.cp.nomer[0])
-        ar = k.cp.nomer[1:len_ar + 1].decode(codepage)
-        self.ar = None if ar == "" else ar
-
-        self.most = k.most[0]
-        self.tel = k.tel[0]
-        self.coord = f"{k.most[0]}-{k.tel[0]}"
-
-        self.year_out = k.datout[-4:].decode(codepage)
-
-        len_cher = int(k.cher[0])
-        self.cher = k.cher[1:len_cher + 1].decode(codepage)
-        self.production_date = k.datap[1:].decode(codepage)
-        self.date_in = k.datin[1:].decode(codepage)
-        self.date_out = k.datout[1:].decode(codepage)
-        self.burn = parse_real48(k.shlak)
-        self.property = 'АО "Концерн Росэнергоатом"' if k.kod_sob == b" " else "Федеральная"
-
-        self.rn = k.rn[0]  # расчетный номер (симетрия 60)
-        self.n360 = k.n360[0]  # номер в АЗ
-        self.complete_camp = k.otrkam[0]  # отработано кампаний
-        self.last_camp = k.potrkam[0]  # последняя отработанная кампания
-        self.uo2 = parse_real48(k.uo2)  # масса UO2 [граммы]
-        self.u85 = parse_real48(k.u85)  # масса U5 + U8
-        self.u5c = parse_real48(k.u5c)  # масса U5 в ТВС когда она была СТВС
-        self.u5 = parse_real48(k.u5)  # масса U235 в ТВС [грамм]
-        self.u6 = parse_real48(k.u6)  # масса U236 в ТВС [грамм]
-        self.u8 = parse_real48(k.u8)  # масса U238 в ТВС [грамм]
-        self.pu8 = parse_real48(k.p8)  # масса Pu238 в ТВС [грамм]
-        self.pu9 = parse_real48(k.p9)  # масса Pu239 в ТВС [грамм]
-        self.pu0 = parse_real48(k.p0)  # масса Pu240 в ТВС [грамм]
-        self.pu1 = parse_real48(k.p1)  # масса Pu241 в ТВС [грамм]
-        self.pu2 = parse_real48(k.p2)  # масса Pu242 в ТВС [грамм]
-        self.summ_isotopes = self.u5 + self.u8 + self.pu8 + self.pu9 + self.pu0 + self.pu1 + self.pu2
-        self.mass = parse_real48(k.gdo)  # масса ТВС [кг]
+    # поля, расшифровываемые из записи K (в порядке расшифровки: summ_isotopes - после масс изотопов).
+    # В ленивом режиме каждое поле расшифровывается при первом обращении (lazy_field)
+    DECODED_FIELDS = (
+        "number", "ar", "most", "tel", "coord", "year_out", "cher", "production_date", "date_in", "date_out",
+        "burn", "property", "rn", "n360", "complete_camp", "last_camp", "uo2", "u85", "u5c", "u5", "u6", "u8",
+        "pu8", "pu9", "pu0", "pu1", "pu2", "summ_isotopes", "mass", "date_heat", "heat_data", "activity_data",
+        "history",
+    )
+
+    def __init__(
+            self,
+            k: K,
+            codepage: str,
+            date: Optional[datetime] = None,
+            real48: Optional[Mapping[str, float]] = None,
+            lazy: bool = False
+    ):
+        """
+        :param k: запись ТОПАЗ
+        :param codepage: используемая кодировка
+        :param date: дата, на которую рассчитывается остаточное энерговыделение (опционально)
+        :param real48: уже расшифрованные поля Real48 записи (имя поля из K_REAL48_LAYOUT - значение).
+            Если не передано - поля расшифровываются из байт записи.
+        :param lazy: не расшифровывать поля при создании (только при обращении к ним)
+        """
+        self.k = k
+        self.codepage = codepage
+        self.real48 = Real48Fields(k) if real48 is None else real48
         self.heat = 0.0  # тепловыделение ТВС, задается только для ТВС, подлежащих отправке
 
-        self.date_heat = k.dat_ras_akt
-
-        self.heat_data = [parse_real48(elm.ost) for elm in k.k_OE_akt.aktiv_OE]
-        self.activity_data = [parse_real48(elm.aktiv) for elm in k.k_OE_akt.aktiv_OE]
-
-        self.history = [Campaign(elm, codepage) for elm in k.history.kamp if elm.bgn_kam != bytes(11)]
+        if not lazy:
+            # поля расшифровываются сразу в обычные атрибуты экземпляра (функции полей - без дескрипторов)
+            fields = type(self).__dict__
+            for name in self.DECODED_FIELDS:
+                self.__dict__[name] = fields[name].func(self)
 
         if date:
             self.raw_heat = self.calculate_heat(date)
 
+    def _decode_string(self, raw) -> str:
+        """Декодирует строку Pascal (string[N]): первый байт - длина строки"""
+        return str(raw[1:raw[0] + 1], self.codepage)
+
+    @lazy_field
+    def number(self) -> str:
+        tip = self.k.tip
+        return self._decode_string(tip.sort) + self._decode_string(tip.nomer) + self._decode_string(tip.indeks)
+
+    @lazy_field
+    def ar(self) -> Optional[str]:
+        ar = self._decode_string(self.k.cp.nomer)
+        return None if ar == "" else ar
+
+    @lazy_field
+    def most(self) -> int:
+        return self.k.most[0]
+
+    @lazy_field
+    def tel(self) -> int:
+        return self.k.tel[0]
+
+    @lazy_field
+    def coord(self) -> str:
+        # координата из файла ТОПАЗ (не меняется при перестановках)
+        return f"{self.k.most[0]}-{self.k.tel[0]}"
+
+    @lazy_field
+    def year_out(self) -> str:
+        return str(self.k.datout[-4:], self.codepage)
+
+    @lazy_field
+    def cher(self) -> str:
+        return self._decode_string(self.k.cher)
+
+    @lazy_field
+    def production_date(self) -> str:
+        return str(self.k.datap[1:], self.codepage)
+
+    @lazy_field
+    def date_in(self) -> str:
+        return str(self.k.datin[1:], self.codepage)
+
+    @lazy_field
+    def date_out(self) -> str:
+        return str(self.k.datout[1:], self.codepage)
+
+    @lazy_field
+    def property(self) -> str:
+        return 'АО "Концерн Росэнергоатом"' if self.k.kod_sob == b" " else "Федеральная"
+
+    @lazy_field
+    def rn(self) -> int:
+        return self.k.rn[0]  # расчетный номер (симетрия 60)
+
+    @lazy_field
+    def n360(self) -> int:
+        return self.k.n360[0]  # номер в АЗ
+
+    @lazy_field
+    def complete_camp(self) -> int:
+        return self.k.otrkam[0]  # отработано кампаний
+
+    @lazy_field
+    def last_camp(self) -> int:
+        return self.k.potrkam[0]  # последняя отработанная кампания
+
+    burn = real48_field("shlak")
+    uo2 = real48_field("uo2")  # масса UO2 [граммы]
+    u85 = real48_field("u85")  # масса U5 + U8
+    u5c = real48_field("u5c")  # масса U5 в ТВС когда она была СТВС
+    u5 = real48_field("u5")  # масса U235 в ТВС [грамм]
+    u6 = real48_field("u6")  # масса U236 в ТВС [грамм]
+    u8 = real48_field("u8")  # масса U238 в ТВС [грамм]
+    pu8 = real48_field("p8")  # масса Pu238 в ТВС [грамм]
+    pu9 = real48_field("p9")  # масса Pu239 в ТВС [грамм]
+    pu0 = real48_field("p0")  # масса Pu240 в ТВС [грамм]
+    pu1 = real48_field("p1")  # масса Pu241 в ТВС [грамм]
+    pu2 = real48_field("p2")  # масса Pu242 в ТВС [грамм]
+    mass = real48_field("gdo")  # масса ТВС [кг]
+
+    @lazy_field
+    def summ_isotopes(self) -> float:
+        return self.u5 + self.u8 + self.pu8 + self.pu9 + self.pu0 + self.pu1 + self.pu2
+
+    @lazy_field
+    def date_heat(self) -> bytes:
+        return bytes(self.k.dat_ras_akt)
+
+    @lazy_field
+    def heat_data(self) -> list[float]:
+        return [self.real48[name] for name in OST_FIELDS]
+
+    @lazy_field
+    def activity_data(self) -> list[float]:
+        return [self.real48[name] for name in AKTIV_FIELDS]
+
+    @lazy_field
+    def heat_curve(self) -> HeatCurve:
+        """Кривая энерговыделения (общая для ТВС с одинаковыми точками heat_data)"""
+        return get_heat_curve(self.heat_data)
+
+    @lazy_field
+    def history(self) -> list[Campaign]:
+        return [self._campaign(j) for j, elm in enumerate(self.k.history.kamp) if elm.bgn_kam != EMPTY_DATE]
+
+    @lazy_field
+    def last_campaign(self) -> Optional[Campaign]:
+        """
+        Последняя кампания из истории ТВС. Если история еще не расшифрована - расшифровывается только эта кампания
+        """
+        if "history" in self.__dict__:
+            return self.history[-1] if self.history else None
+        kamp = self.k.history.kamp
+        for j in reversed(range(len(kamp))):
+            if kamp[j].bgn_kam != EMPTY_DATE:
+                return self._campaign(j)
+        return None
+
+    def __getstate__(self) -> dict:
+        """
+        Состояние для сериализации (кэш, передача между процессами): все поля расшифровываются,
+        ссылки на запись K (отображение файла в память) не сохраняются
+        """
+        for name in self.DECODED_FIELDS + ("last_campaign",):
+            getattr(self, name)
+        state = self.__dict__.copy()
+        state.pop("k", None)
+        state.pop("real48", None)
+        return state
+
+    def _campaign(self, j: int) -> Campaign:
+        """Расшифровывает j-ю кампанию истории ТВС"""
+        return Campaign(self.k.history.kamp[j], self.codepage, self.real48[f"shl_end{j}"], self.real48[f"teff{j}"])
+
     def __repr__(self):
         return f"{self.number}  {self.ar}  {self.coord}  {self.heat}"
 
     def calculate_heat(self, date: datetime) -> float:
         """
-        Вычисляет значение остаточного энерговыделения ТВС путем линейной интерполяции
+        Вычисляет значение остаточного энерговыделения ТВС путем линейной интерполяции (за O(1), см. HeatCurve)
         """
         try:
-            last_campaign_end = self.history[-1].end
+            last_campaign_end = self.last_campaign.end
         except Exception:
             print(f"Невозможно вычислить остаточное энерговыделение ТВС {self.number}: ")
             print(f"(Проблемы с доступом к полям TVS.history)")
@@ -455,15 +703,7 @@ class TVS:
             print(f"(Введена дата, соответствующая выдержки ТВС более 30 лет)")
             return 0
 
-        for i in range(0, len(EXPOSURE_DAYS) + 1):
-            x2 = EXPOSURE_DAYS[i]
-            if x2 >= exposure:
-                y2 = self.heat_data[i]
-                x1 = EXPOSURE_DAYS[i - 1]
-                y1 = self.heat_data[i - 1]
-                break
-
-        return y1 + (exposure - x1) * (y2 - y1) / (x2 - x1)
+        return self.heat_curve(exposure)
 
     def get_passport(self, cell_number: int) -> dict:
         """
@@ -500,16 +740,17 @@ class TVS:
         Возвращает название секции БВ, где находится ТВС
         :return: Optional[str]
         """
-        if 1 <= self.most <= 15:
-            return "az"
-        elif 43 <= self.most <= 58:
-            return "b03"
-        elif 60 <= self.most <= 75:
-            return "b01"
-        elif 76 <= self.most <= 90:
-            return "b02"
-        else:
-            return None
+        return self.section_by_most(self.most)
+
+    @staticmethod
+    def section_by_most(most: int) -> Optional[str]:
+        """
+        Возвращает название секции (АЗ или отсек БВ) по номеру моста (см. SECTION_BY_MOST)
+        :return: Optional[str]
+        """
+        if 0 <= most < len(SECTION_BY_MOST):
+            return SECTION_BY_MOST[most]
+        return None
 
 
 class Cell:
@@ -604,23 +845,48 @@ class Container:
         for i in queue:
             yield self.cells[i - 1]
 
+    def loaded_cells(self):
+        """
+        Генератор загруженных ячеек (в порядке номеров)
+        :return:
+        """
+        for cell in self.cells:
+            if not cell.is_empty():
+                yield cell
+
+    def get_mp_line(self, operation, cell) -> str:
+        """
+        Формирует строку файла МП для перестановки ТВС ячейки в контейнер
+        :param operation: номер операции
+        :param cell: загруженная ячейка
+        :return: строка файла МП
+        """
+        ar_code = "606" if cell.tvs.ar else "600"
+        # текущие координаты ТВС (после выполненных перестановок)
+        return (
+            f"{operation}	12	{ar_code}	{cell.tvs.number}	{cell.tvs.most}	{cell.tvs.tel}	100{self.number}		{cell.number}		N	00:00	00:00	00:00	00:00	0	0	0	0	0\n"
+        )
+
+    def get_permutation_row(self, operation, cell) -> list[str]:
+        """
+        Формирует строку таблицы перестановок для ТВС ячейки
+        :param operation: номер операции
+        :param cell: загруженная ячейка
+        :return: список значений ячеек строки таблицы
+        """
+        ar = cell.tvs.ar if cell.tvs.ar else "-"
+        return [f"{operation}", f"{cell.tvs.number}", f"{ar}", f"{cell.tvs.most}-{cell.tvs.tel}", " ", " ", f"{cell.number}"]
+
     def add_mp_data(self, oper_gen, mp_file):
         """
         Добавляет в файл МП данные о перестановках для формирования чехла
+        (для нескольких контейнеров - write_mp_data: файл открывается один раз)
         :param oper_gen: генератор номера операции
         :param mp_file: файл для записи данных для МП
         :return: None
         """
         with open(mp_file, "a") as file:
-            for cell in self.cells:
-                if not cell.is_empty():
-                    ar_code = "606" if cell.tvs.ar else "600"
-                    coord_split = cell.tvs.coord.split("-")
-                    most = coord_split[0]
-                    tel = coord_split[1]
-                    file.write(
-                        f"{next(oper_gen)}	12	{ar_code}	{cell.tvs.number}	{most}	{tel}	100{self.number}		{cell.number}		N	00:00	00:00	00:00	00:00	0	0	0	0	0\n"
-                    )
+            file.writelines(self.get_mp_line(next(oper_gen), cell) for cell in self.loaded_cells())
 
     def get_tvs_count(self):
         """
@@ -699,25 +965,7 @@ class Container:
         :param: oper_gen: генератор номера операции
         :return:
         """
-        permutations = []
-
-        def add_cell(permutations: list, cell):
-            """
-            Добавляет ячейку в словарь картограммы
-            :param permutations: список из значений строк таблицы
-            :param cell: ячейка контейенра
-            :return: список значений для вставки в строку таблицы
-            """
-            ar = cell.tvs.ar if cell.tvs.ar else "-"
-            permutations.append(
-                [f"{next(oper_gen)}", f"{cell.tvs.number}", f"{ar}", f"{cell.tvs.coord}", " ", " ", f"{cell.number}"])
-            return permutations
-
-        for cell in self.cells:
-            if not cell.is_empty():
-                permutations = add_cell(permutations, cell)
-
-        return permutations
+        return [self.get_permutation_row(next(oper_gen), cell) for cell in self.loaded_cells()]
 
     def get_passport_data(self) -> dict[str, str]:
         """
@@ -733,3 +981,25 @@ class Container:
         data["heat_overall"] = str(round(self.heat, 2)).replace(".", ",")
         data["container_number"] = self.number
         return data
+
+
+def write_mp_data(containers, oper_gen, mp_file, mode="w", with_permutations=False) -> list[list[str]]:
+    """
+    Записывает перестановки всех контейнеров в файл МП за один проход: файл открывается один раз,
+    номера операций - общие для всех контейнеров (из oper_gen)
+    :param containers: контейнеры в порядке загрузки
+    :param oper_gen: генератор номера операции
+    :param mp_file: файл для записи данных для МП
+    :param mode: "w" - перезаписать файл, "a" - дописать
+    :param with_permutations: составить также строки таблицы перестановок (с теми же номерами операций)
+    :return: строки таблицы перестановок (см. Container.get_permutations) или пустой список
+    """
+    permutations = []
+    with open(mp_file, mode) as file:
+        for container in containers:
+            for cell in container.loaded_cells():
+                operation = next(oper_gen)
+                file.write(container.get_mp_line(operation, cell))
+                if with_permutations:
+                    permutations.append(container.get_permutation_row(operation, cell))
+    return permutations
@@ -1,21 +1,37 @@
 TIME_DATE_FORMAT = "%d.%m.%Y %H:%M"
 DATE_FORMAT = "%d.%m.%Y"
+# размер записи K в файле состояния ТОПАЗ
+CHUNK_SIZE = 1749
+# номера мостов АЗ и отсеков БВ
+SECTION_MOSTS = {
+    "az": range(1, 16),
+    "b03": range(43, 59),
+    "b01": range(60, 76),
+    "b02": range(76, 91),
+}
+# отсек по номеру моста: таблица на все значения байта K.most (None - вне АЗ и БВ)
+SECTION_BY_MOST = tuple(
+    next((section for section, mosts in SECTION_MOSTS.items() if most in mosts), None) for most in range(256)
+)
 EXPOSURE_DAYS = [0, 5, 15, 30, 90, 183, 365, 730, 1095, 1460, 1825, 3650, 7300, 10960]
 
-reactor_places_gen = {
-    15: (col for col in range(24, 36, 2)),
-    14: (col for col in range(21, 39, 2)),
-    13: (col for col in range(20, 40, 2)),
-    12: (col for col in range(19, 41, 2)),
-    11: (col for col in range(18, 42, 2)),
-    10: (col for col in range(17, 43, 2)),
-    9: (col for col in range(16, 44, 2)),
-    8: (col for col in range(17, 43, 2)),
-    7: (col for col in range(16, 44, 2)),
-    6: (col for col in range(17, 43, 2)),
-    5: (col for col in range(18, 42, 2)),
-    4: (col for col in range(19, 41, 2)),
-    3: (col for col in range(20, 40, 2)),
-    2: (col for col in range(21, 39, 2)),
-    1: (col for col in range(24, 36, 2)),
+# ячейки АЗ: мост -> тележки (нумерация ячеек АЗ - в этом порядке, см. AZ_COORDINATES)
+REACTOR_PLACES = {
+    15: range(24, 36, 2),
+    14: range(21, 39, 2),
+    13: range(20, 40, 2),
+    12: range(19, 41, 2),
+    11: range(18, 42, 2),
+    10: range(17, 43, 2),
+    9: range(16, 44, 2),
+    8: range(17, 43, 2),
+    7: range(16, 44, 2),
+    6: range(17, 43, 2),
+    5: range(18, 42, 2),
+    4: range(19, 41, 2),
+    3: range(20, 40, 2),
+    2: range(21, 39, 2),
+    1: range(24, 36, 2),
 }
+# координаты ячеек АЗ (мост, тележка) по номеру ячейки: ячейка N - AZ_COORDINATES[N - 1]
+AZ_COORDINATES = tuple((most, tel) for most, tels in REACTOR_PLACES.items() for tel in tels)
@@ -0,0 +1,343 @@
+"""
+Подбор загрузки транспортных контейнеров: набор ТВС на вывоз распределяется по минимальному числу
+12-местных контейнеров (Container) так, чтобы энерговыделение каждого контейнера не превышало допустимого,
+а энерговыделение контейнеров было выровнено (минимально максимальное энерговыделение контейнера).
+
+Распределение - эвристика "в наименее нагруженный контейнер" (ТВС по убыванию энерговыделения;
+если так ТВС не помещаются - "в наиболее нагруженный, где помещается") с последующим выравниванием
+переносами и обменами ТВС; для небольших наборов (до EXACT_SEARCH_LIMIT ТВС) результат уточняется
+точным перебором с отсечениями.
+
+Запуск из командной строки (файл - номера ТВС на вывоз, по одному в строке):
+python3 container_packing.py input/otvs_list.txt --limit 12
+"""
+import argparse
+import heapq
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from math import ceil
+from typing import TYPE_CHECKING, Optional
+
+from classes import Container
+from constants import TIME_DATE_FORMAT
+from error import ContainerHeatLimitError
+from report import ReportConfig, load_inputs
+
+if TYPE_CHECKING:
+    from classes import TVS
+
+CONTAINER_CELLS = 12
+# наборы не больше этого размера распределяются точным перебором: до 12 ТВС перебор завершается в пределах
+# EXACT_SEARCH_NODES при любом числе контейнеров, для 14 ТВС и более - не всегда (2-4 контейнера)
+EXACT_SEARCH_LIMIT = 12
+# ограничение числа узлов точного перебора (при исчерпании остается лучшее найденное распределение)
+EXACT_SEARCH_NODES = 50_000
+EPS = 1e-9
+
+
+@dataclass
+class PackingResult:
+    containers: list[Container]
+    # нижняя оценка числа контейнеров: по числу ячеек и по суммарному энерговыделению
+    lower_bound: int
+    # распределение доказанно оптимально (точный перебор завершен)
+    exact: bool
+
+    @property
+    def max_heat(self) -> float:
+        return max((container.heat for container in self.containers), default=0.0)
+
+    @property
+    def min_heat(self) -> float:
+        return min((container.heat for container in self.containers), default=0.0)
+
+
+def lower_bound(heats: list[float], heat_limit: float, capacity: int = CONTAINER_CELLS) -> int:
+    """
+    Нижняя оценка числа контейнеров
+    """
+    if not heats:
+        return 0
+    return max(ceil(len(heats) / capacity), ceil(sum(heats) / heat_limit - EPS))
+
+
+def balanced_fit(heats: list[float], bins: int, heat_limit: float, capacity: int) -> Optional[list[list[int]]]:
+    """
+    Распределяет ТВС (индексы в `heats`, по убыванию энерговыделения) в `bins` контейнеров:
+    каждая ТВС - в наименее нагруженный контейнер, где она помещается
+    :return: индексы ТВС по контейнерам или None, если ТВС не помещаются
+    """
+    order = sorted(range(len(heats)), key=lambda i: heats[i], reverse=True)
+    groups = [[] for _ in range(bins)]
+    # (энерговыделение, номер контейнера); заполненные и перегруженные контейнеры откладываются
+    heap = [(0.0, j) for j in range(bins)]
+    for i in order:
+        skipped = []
+        while heap:
+            load, j = heapq.heappop(heap)
+            if len(groups[j]) < capacity and load + heats[i] <= heat_limit + EPS:
+                groups[j].append(i)
+                heapq.heappush(heap, (load + heats[i], j))
+                break
+            skipped.append((load, j))
+        else:
+            return None
+        for item in skipped:
+            if len(groups[item[1]]) < capacity:
+                heapq.heappush(heap, item)
+    return groups
+
+
+def best_fit(heats: list[float], bins: int, heat_limit: float, capacity: int) -> Optional[list[list[int]]]:
+    """
+    Распределяет ТВС (по убыванию энерговыделения) в `bins` контейнеров: каждая ТВС - в наиболее нагруженный
+    контейнер, где она помещается (плотнее balanced_fit); если ТВС не помещается никуда, для нее освобождается
+    место переносом одной ТВС из контейнера в другой
+    :return: индексы ТВС по контейнерам или None, если ТВС не помещаются
+    """
+    order = sorted(range(len(heats)), key=lambda i: heats[i], reverse=True)
+    groups = [[] for _ in range(bins)]
+    loads = [0.0] * bins
+
+    def fits(j: int, i: int) -> bool:
+        return len(groups[j]) < capacity and loads[j] + heats[i] <= heat_limit + EPS
+
+    def put(j: int, i: int):
+        groups[j].append(i)
+        loads[j] += heats[i]
+
+    for i in order:
+        candidates = [j for j in range(bins) if fits(j, i)]
+        if candidates:
+            put(max(candidates, key=loads.__getitem__), i)
+            continue
+        if not eject(i, groups, loads, heats, heat_limit, capacity):
+            return None
+    return groups
+
+
+def eject(i: int, groups: list[list[int]], loads: list[float], heats: list[float], heat_limit: float,
+          capacity: int) -> bool:
+    """
+    Размещает ТВС `i`, перенося одну ТВС из контейнера A в контейнер B, где для нее есть место
+    :return: False - такого переноса нет
+    """
+    for a in range(len(groups)):
+        for pos, moved in enumerate(groups[a]):
+            if loads[a] - heats[moved] + heats[i] > heat_limit + EPS:
+                continue
+            for b in range(len(groups)):
+                if b != a and len(groups[b]) < capacity and loads[b] + heats[moved] <= heat_limit + EPS:
+                    groups[a][pos] = i
+                    loads[a] += heats[i] - heats[moved]
+                    groups[b].append(moved)
+                    loads[b] += heats[moved]
+                    return True
+    return False
+
+
+def rebalance(groups: list[list[int]], heats: list[float], heat_limit: float, capacity: int, max_rounds: int = 10_000):
+    """
+    Выравнивает энерговыделение контейнеров: ТВС наиболее нагруженного контейнера переносится
+    или меняется местами с ТВС другого контейнера, пока это уменьшает его энерговыделение
+    """
+    loads = [sum(heats[i] for i in group) for group in groups]
+    for _ in range(max_rounds):
+        hi = max(range(len(groups)), key=loads.__getitem__)
+        best = None  # (новое энерговыделение hi, контейнер, ТВС из hi, ТВС из контейнера или None)
+        for lo in range(len(groups)):
+            if lo == hi:
+                continue
+            for a_pos, a in enumerate(groups[hi]):
+                if len(groups[lo]) < capacity:
+                    new_hi, new_lo = loads[hi] - heats[a], loads[lo] + heats[a]
+                    if new_lo <= heat_limit + EPS and max(new_hi, new_lo) < loads[hi] - EPS:
+                        if best is None or max(new_hi, new_lo) < best[0]:
+                            best = (max(new_hi, new_lo), lo, a_pos, None)
+                for b_pos, b in enumerate(groups[lo]):
+                    delta = heats[a] - heats[b]
+                    if delta <= EPS:
+                        continue
+                    new_hi, new_lo = loads[hi] - delta, loads[lo] + delta
+                    if new_lo <= heat_limit + EPS and max(new_hi, new_lo) < loads[hi] - EPS:
+                        if best is None or max(new_hi, new_lo) < best[0]:
+                            best = (max(new_hi, new_lo), lo, a_pos, b_pos)
+        if best is None:
+            return groups
+
+        _, lo, a_pos, b_pos = best
+        a = groups[hi].pop(a_pos)
+        groups[lo].append(a)
+        loads[hi] -= heats[a]
+        loads[lo] += heats[a]
+        if b_pos is not None:
+            b = groups[lo].pop(b_pos)
+            groups[hi].append(b)
+            loads[lo] -= heats[b]
+            loads[hi] += heats[b]
+    return groups
+
+
+def exact_pack(
+        heats: list[float],
+        heat_limit: float,
+        capacity: int,
+        bins: int,
+        best_max: float
+) -> (Optional[list[list[int]]], bool):
+    """
+    Точный перебор распределений ТВС по `bins` контейнерам с минимальным максимальным энерговыделением
+    (ветви с энерговыделением не меньше `best_max` отсекаются)
+    :return: лучшее найденное распределение (None - не найдено лучше `best_max`), перебор завершен полностью
+    """
+    order = sorted(range(len(heats)), key=lambda i: heats[i], reverse=True)
+    loads = [0.0] * bins
+    groups = [[] for _ in range(bins)]
+    suffix = [0.0] * (len(order) + 1)
+    for k in range(len(order) - 1, -1, -1):
+        suffix[k] = suffix[k + 1] + heats[order[k]]
+    best = {"max": best_max, "groups": None}
+    # никакое распределение не лучше этой оценки: при ее достижении перебор завершается
+    optimum_bound = max(suffix[0] / bins, max(heats, default=0.0))
+    nodes = 0
+
+    def search(k: int, current_max: float) -> bool:
+        """
+        :return: False - исчерпан лимит узлов
+        """
+        nonlocal nodes
+        nodes += 1
+        if nodes > EXACT_SEARCH_NODES:
+            return False
+        if k == len(order):
+            best["max"] = current_max
+            best["groups"] = [list(group) for group in groups]
+            return True
+        # оценка снизу: остаток энерговыделения в лучшем случае делится поровну между незаполненными контейнерами
+        room = [load for load, group in zip(loads, groups) if len(group) < capacity]
+        if not room:
+            return True
+        if max(current_max, (sum(room) + suffix[k]) / len(room)) >= best["max"] - EPS:
+            return True
+
+        i = order[k]
+        tried = set()
+        for j in range(bins):
+            state = (round(loads[j], 9), len(groups[j]))
+            # контейнеры в одинаковом состоянии взаимозаменяемы
+            if state in tried or len(groups[j]) >= capacity:
+                continue
+            tried.add(state)
+            new_load = loads[j] + heats[i]
+            if new_load > heat_limit + EPS or new_load >= best["max"] - EPS:
+                continue
+            loads[j] = new_load
+            groups[j].append(i)
+            complete = search(k + 1, max(current_max, new_load))
+            groups[j].pop()
+            loads[j] -= heats[i]
+            if not complete:
+                return False
+            if best["max"] <= optimum_bound + EPS:
+                return True
+        return True
+
+    complete = search(0, 0.0)
+    return best["groups"], complete
+
+
+def pack_tvs(
+        tvs_lst: list["TVS"],
+        heat_limit: float,
+        first_number: int = 1,
+        capacity: int = CONTAINER_CELLS
+) -> PackingResult:
+    """
+    Распределяет ТВС по минимальному числу контейнеров с выровненным энерговыделением
+    :param tvs_lst: ТВС на вывоз (с заданным TVS.heat)
+    :param heat_limit: допустимое энерговыделение контейнера
+    :param first_number: номер первого контейнера
+    :param capacity: число ячеек контейнера
+    :return: PackingResult (контейнеры по убыванию энерговыделения, ячейки заполнены - см. Container.fill_cells)
+    """
+    heats = [tvs.heat for tvs in tvs_lst]
+    for tvs in tvs_lst:
+        if tvs.heat > heat_limit + EPS:
+            raise ContainerHeatLimitError(tvs.number, tvs.heat, heat_limit)
+
+    bound = lower_bound(heats, heat_limit, capacity)
+    groups = None
+    bins = bound
+    while groups is None and bins <= len(heats):
+        groups = balanced_fit(heats, bins, heat_limit, capacity) or best_fit(heats, bins, heat_limit, capacity)
+        if groups is None:
+            bins += 1
+    groups = rebalance(groups, heats, heat_limit, capacity) if groups else []
+
+    exact = not heats
+    if 0 < len(heats) <= EXACT_SEARCH_LIMIT:
+        exact = True
+        # меньшее число контейнеров, чем дала эвристика
+        for fewer_bins in range(bound, bins):
+            found, complete = exact_pack(heats, heat_limit, capacity, fewer_bins, float("inf"))
+            exact = exact and complete
+            if found is not None:
+                groups = found
+                break
+        # выравнивание при найденном числе контейнеров
+        best_max = max(sum(heats[i] for i in group) for group in groups)
+        found, complete = exact_pack(heats, heat_limit, capacity, len(groups), best_max)
+        exact = exact and complete
+        if found is not None:
+            groups = found
+
+    containers = []
+    for group in sorted(groups, key=lambda group: sum(heats[i] for i in group), reverse=True):
+        if not group:
+            continue
+        container = Container(first_number + len(containers))
+        container.tvs_lst = [tvs_lst[i] for i in group]
+        container.calculate_heat()
+        container.fill_cells()
+        containers.append(container)
+    return PackingResult(containers, bound, exact)
+
+
+def read_tvs_numbers(file_path: str) -> list[str]:
+    """
+    Читает номера ТВС на вывоз (по одному в строке, пустые строки пропускаются)
+    """
+    with open(file_path, "r") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Распределение ТВС по транспортным контейнерам")
+    parser.add_argument("tvs_file", help="файл номеров ТВС на вывоз (по одному в строке)")
+    parser.add_argument("--limit", type=float, required=True, help="допустимое энерговыделение контейнера")
+    parser.add_argument("--date", default=None,
+                        help="дата расчета энерговыделения ТВС, дд.мм.гггг чч:мм (по умолчанию - начало вывоза ОТВС)")
+    parser.add_argument("--first-number", type=int, default=1, help="номер первого контейнера (по умолчанию - 1)")
+    args = parser.parse_args()
+
+    config = ReportConfig.from_input_dir(os.path.join(os.getcwd(), "input"))
+    date = config.dates.otvs_begin if args.date is None else datetime.strptime(args.date, TIME_DATE_FORMAT)
+    tvs_hash, _ = load_inputs(config)
+
+    tvs_lst = []
+    for number in read_tvs_numbers(args.tvs_file):
+        if number not in tvs_hash:
+            print(f"ТВС {number} отсутствует в файле состояния")
+            continue
+        tvs = tvs_hash[number]
+        tvs.heat = tvs.calculate_heat(date)
+        tvs_lst.append(tvs)
+
+    result = pack_tvs(tvs_lst, args.limit, args.first_number)
+    for container in result.containers:
+        print(container)
+    print(f"Контейнеров: {len(result.containers)} (нижняя оценка: {result.lower_bound}"
+          f"{', распределение оптимально' if result.exact else ''}); "
+          f"энерговыделение: {round(result.min_heat, 4)} - {round(result.max_heat, 4)}")
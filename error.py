@@ -4,3 +4,48 @@ class CustomFileNotFound(FileNotFoundError):
 
     def __str__(self):
         return f"\nНе найден файл: {self.file_path}.\nВосстановите его и перезапустите скрипт."
+
+
+class MPFileError(ValueError):
+    def __init__(self, file_path, errors):
+        """
+        :param file_path: файл МП
+        :param errors: list[(номер строки, строка, причина)] - все некорректные строки файла
+        """
+        self.file_path = file_path
+        self.errors = errors
+
+    def __str__(self):
+        lines = "\n".join(f"строка {number}: {reason}: `{line}`" for number, line, reason in self.errors)
+        return (f"\nОшибка парсинга файла МП: {self.file_path} (некорректных строк: {len(self.errors)}).\n{lines}\n"
+                f"Исправьте файл и перезапустите скрипт.")
+
+
+class ContainerHeatLimitError(ValueError):
+    def __init__(self, tvs_number, heat, heat_limit):
+        """
+        :param tvs_number: номер ТВС, которая не помещается ни в один контейнер
+        :param heat: энерговыделение ТВС
+        :param heat_limit: допустимое энерговыделение контейнера
+        """
+        self.tvs_number = tvs_number
+        self.heat = heat
+        self.heat_limit = heat_limit
+
+    def __str__(self):
+        return (f"\nЭнерговыделение ТВС {self.tvs_number} ({round(self.heat, 4)}) превышает допустимое "
+                f"энерговыделение контейнера ({self.heat_limit}).\nИсключите ТВС из списка на вывоз.")
+
+
+class CheckpointMismatchError(ValueError):
+    def __init__(self, checkpoint_time, reason):
+        """
+        :param checkpoint_time: момент контрольной точки
+        :param reason: расхождение событий варианта с событиями, на которых получена точка
+        """
+        self.checkpoint_time = checkpoint_time
+        self.reason = reason
+
+    def __str__(self):
+        return (f"\nНевозможно продолжить моделирование с контрольной точки {self.checkpoint_time}: {self.reason}.\n"
+                f"Изменения варианта должны касаться только перестановок после контрольной точки.")
@@ -0,0 +1,229 @@
+"""
+В данном модуле представлены методы пакетного расчета остаточного энерговыделения ТВС
+(для всего пула и всего расчетного периода сразу).
+"""
+from bisect import bisect_right
+from datetime import datetime, time
+from typing import TYPE_CHECKING, Iterable, Literal, Optional
+
+from constants import EXPOSURE_DAYS
+
+if TYPE_CHECKING:
+    from classes import TVS
+
+# номер отрезка интерполяции для каждой целой выдержки 0..EXPOSURE_DAYS[-1] суток (общий для всех ТВС):
+# первый i, для которого EXPOSURE_DAYS[i] >= выдержки
+SEGMENT_INDEX = bytes(
+    next(i for i, x in enumerate(EXPOSURE_DAYS) if x >= exposure) for exposure in range(EXPOSURE_DAYS[-1] + 1)
+)
+
+
+class HeatCurve:
+    """
+    Кривая остаточного энерговыделения ТВС (кусочно-линейная по точкам EXPOSURE_DAYS) с вычислением за O(1):
+    отрезок интерполяции находится по таблице SEGMENT_INDEX, параметры отрезков рассчитаны заранее.
+    Одинаковые кривые разных ТВС - один и тот же объект (см. get_heat_curve).
+    """
+
+    __slots__ = ("heat_data", "segments")
+
+    def __init__(self, heat_data: tuple[float, ...]):
+        self.heat_data = heat_data
+        # для каждого отрезка i: (x1, y1, y2 - y1, x2 - x1); при i = 0 (выдержка 0 суток) отрезок начинается
+        # в EXPOSURE_DAYS[-1] - так же, как в исходной формуле TVS.calculate_heat
+        self.segments = tuple(
+            (x1, y1, y2 - y1, x2 - x1)
+            for x1, y1, x2, y2 in (
+                (EXPOSURE_DAYS[i - 1], heat_data[i - 1], EXPOSURE_DAYS[i], heat_data[i])
+                for i in range(len(EXPOSURE_DAYS))
+            )
+        )
+
+    def __call__(self, exposure: int) -> float:
+        """
+        Энерговыделение при выдержке `exposure` [сутки]; вне диапазона EXPOSURE_DAYS - 0
+        """
+        if exposure < EXPOSURE_DAYS[0] or exposure > EXPOSURE_DAYS[-1]:
+            return 0.0
+        x1, y1, dy, dx = self.segments[SEGMENT_INDEX[exposure]]
+        return y1 + (exposure - x1) * dy / dx
+
+
+# реестр кривых: dict[точки кривой, кривая]
+_heat_curves: dict[tuple[float, ...], HeatCurve] = {}
+
+
+def get_heat_curve(heat_data: Iterable[float]) -> HeatCurve:
+    """
+    Возвращает кривую энерговыделения по точкам heat_data; кривые с одинаковыми точками разделяются между ТВС
+    """
+    key = tuple(heat_data)
+    curve = _heat_curves.get(key)
+    if curve is None:
+        curve = _heat_curves[key] = HeatCurve(key)
+    return curve
+
+
+def day_number(moment: datetime) -> float:
+    """
+    Порядковый номер дня с долей суток: для полуночи совпадает с datetime.toordinal()
+    """
+    return moment.toordinal() + (moment - datetime.combine(moment.date(), time())).total_seconds() / 86400
+
+
+def get_last_campaign_end(tvs: "TVS") -> Optional[datetime]:
+    """
+    Возвращает дату окончания последней кампании ТВС (None, если ее невозможно получить)
+    """
+    try:
+        return tvs.last_campaign.end
+    except Exception:
+        return None
+
+
+def curve_breakpoints(
+        curve: HeatCurve,
+        end_day: int,
+        beyond: Literal["zero", "hold"] = "zero"
+) -> list[tuple[int, float, float]]:
+    """
+    Раскладывает энерговыделение ТВС как функцию абсолютной даты (порядкового номера дня) на точки излома:
+    f(t) = сумма по точкам b <= t: (скачок_b + изменение_наклона_b * (t - b)).
+    До окончания кампании энерговыделение равно 0 (как в calculate_heat).
+    :param curve: кривая энерговыделения ТВС
+    :param end_day: порядковый номер дня окончания последней кампании (datetime.toordinal())
+    :param beyond: энерговыделение при выдержке более EXPOSURE_DAYS[-1] суток: "zero" - 0 (как в calculate_heat),
+    "hold" - сохраняется значение последней точки кривой
+    :return: list[(день, скачок, изменение наклона)]
+    """
+    slopes = [dy / dx for _, _, dy, dx in curve.segments[1:]]
+    points = [(end_day, curve.heat_data[0], slopes[0])]
+    for k in range(1, len(slopes)):
+        points.append((end_day + EXPOSURE_DAYS[k], 0.0, slopes[k] - slopes[k - 1]))
+    if beyond == "hold":
+        # после последней точки кривой энерговыделение постоянно
+        points.append((end_day + EXPOSURE_DAYS[-1], 0.0, -slopes[-1]))
+    else:
+        # на следующие сутки после последней точки кривой энерговыделение обнуляется
+        last_value = curve.heat_data[-1] + slopes[-1]
+        points.append((end_day + EXPOSURE_DAYS[-1] + 1, -last_value, -slopes[-1]))
+    return points
+
+
+class CurveSum:
+    """
+    Сумма кусочно-линейных кривых энерговыделения ТВС как функция абсолютной даты с изменяемым составом:
+    добавление/удаление кривой - O(log n) на точку излома, значение на дату - O(log n).
+    Точки излома хранятся в двух деревьях Фенвика над общим упорядоченным набором дней `days`:
+    f(t) = A(<= t) + (t - origin) * C(<= t), где C - сумма изменений наклона,
+    A - сумма (скачок - изменение наклона * (b - origin)).
+    """
+
+    def __init__(self, days: list[int]):
+        """
+        :param days: возрастающий список всех дней, в которых могут находиться точки излома добавляемых кривых
+        """
+        self.days = days
+        self.origin = days[0] if days else 0
+        self.position = {day: i + 1 for i, day in enumerate(days)}
+        self.values = [0.0] * (len(days) + 1)
+        self.slopes = [0.0] * (len(days) + 1)
+
+    def add(self, points: list[tuple[int, float, float]], sign: int = 1):
+        """
+        Добавляет (sign = 1) или удаляет (sign = -1) кривую, заданную точками излома (см. curve_breakpoints)
+        """
+        size = len(self.values)
+        for day, jump, slope in points:
+            value = sign * (jump - slope * (day - self.origin))
+            slope *= sign
+            i = self.position[day]
+            while i < size:
+                self.values[i] += value
+                self.slopes[i] += slope
+                i += i & -i
+
+    def clear(self):
+        """
+        Удаляет все кривые (деревья обнуляются точно, без погрешности округления от вычитания кривых)
+        """
+        self.values = [0.0] * len(self.values)
+        self.slopes = [0.0] * len(self.slopes)
+
+    def __call__(self, day: int) -> float:
+        """
+        Значение суммы кривых в день `day` (порядковый номер дня)
+        """
+        i = bisect_right(self.days, day)
+        value = 0.0
+        slope = 0.0
+        while i > 0:
+            value += self.values[i]
+            slope += self.slopes[i]
+            i -= i & -i
+        return value + slope * (day - self.origin)
+
+
+class MergedCurve:
+    """
+    Сумма кривых энерговыделения ТВС (например, всех ТВС отсека), сведенная в одну кусочно-линейную функцию
+    абсолютной даты: значение на любую дату - бинарный поиск по точкам излома, O(log n).
+    """
+
+    def __init__(self, points: Iterable[tuple[int, float, float]]):
+        """
+        :param points: точки излома всех суммируемых кривых (см. curve_breakpoints)
+        """
+        merged: dict[int, list[float]] = {}
+        for day, jump, slope in points:
+            point = merged.setdefault(day, [0.0, 0.0])
+            point[0] += jump
+            point[1] += slope
+
+        self.days = sorted(merged)
+        # значение суммы в точке излома и наклон на отрезке до следующей точки
+        self.values = []
+        self.slopes = []
+        value = 0.0
+        slope = 0.0
+        previous_day = self.days[0] if self.days else 0
+        for day in self.days:
+            jump, slope_change = merged[day]
+            value += slope * (day - previous_day) + jump
+            slope += slope_change
+            self.values.append(value)
+            self.slopes.append(slope)
+            previous_day = day
+
+    def __call__(self, day: int) -> float:
+        """
+        Значение суммы кривых в день `day` (порядковый номер дня)
+        """
+        j = bisect_right(self.days, day) - 1
+        if j < 0:
+            return 0.0
+        return self.values[j] + self.slopes[j] * (day - self.days[j])
+
+    def at(self, date: datetime) -> float:
+        """
+        Значение суммы кривых на дату (время внутри суток учитывается линейной интерполяцией)
+        """
+        return self(day_number(date))
+
+
+def merge_curves(tvs_pool: Iterable["TVS"], beyond: Literal["zero", "hold"] = "zero") -> MergedCurve:
+    """
+    Сводит кривые энерговыделения ТВС в одну функцию абсолютной даты.
+    ТВС без даты окончания последней кампании не учитываются (их энерговыделение невозможно вычислить).
+    :param tvs_pool: суммируемые ТВС
+    :param beyond: энерговыделение при выдержке более EXPOSURE_DAYS[-1] суток (см. curve_breakpoints)
+    """
+    points = []
+    for tvs in tvs_pool:
+        end = get_last_campaign_end(tvs)
+        if end is None:
+            print(f"Невозможно вычислить остаточное энерговыделение ТВС {tvs.number}: ")
+            print(f"(Проблемы с доступом к полям TVS.history)")
+            continue
+        points.extend(curve_breakpoints(tvs.heat_curve, end.toordinal(), beyond))
+    return MergedCurve(points)
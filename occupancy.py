@@ -0,0 +1,168 @@
+"""
+В данном модуле представлена сетка занятости ячеек АЗ и БВ с целочисленными координатами:
+ячейка (мост, тележка) -> индекс ТВС, проверка "кто стоит" / "свободна ли ячейка" - O(1).
+Проверка перестановок прогоняет по сетке за один проход те же перестановки этапов, что и справка
+(report.load_inputs: при отсутствии файла МП этапа 5 - обратные перестановки этапа 3), и собирает все конфликты:
+перемещение ТВС, отсутствующей в файле состояния, и перемещение в занятую ячейку.
+Некорректные строки файлов МП, как и при расчете справки, прерывают проверку (MPFileError со всеми строками).
+Места вне АЗ и БВ (например, чехлы транспортных контейнеров или заглушка 0-0) занятость не учитывают:
+ТВС, стоящая там в исходном состоянии или перемещенная туда, в сетке не стоит.
+
+Запуск проверки перестановок из командной строки:
+python3 occupancy.py
+"""
+import os
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from constants import SECTION_BY_MOST
+from report import ReportConfig, load_inputs
+
+if TYPE_CHECKING:
+    from classes import TVS
+    from services import Permutation
+
+# координаты ТВС в файле ТОПАЗ - байты: мост и тележка 0..255
+GRID_SIDE = 256
+EMPTY = -1
+
+
+def cell_index(most: int, tel: int) -> Optional[int]:
+    """
+    Номер ячейки сетки по координатам (None - координаты вне сетки или мост вне АЗ и БВ,
+    например, заглушка 0-0 или контейнер)
+    """
+    if not (0 <= most < GRID_SIDE and 0 <= tel < GRID_SIDE) or SECTION_BY_MOST[most] is None:
+        return None
+    return most * GRID_SIDE + tel
+
+
+# этапы в порядке выполнения (как в report.load_inputs)
+STAGE_NAMES = ("этап 3", "этап 5", "вывоз ОТВС")
+
+
+@dataclass
+class Conflict:
+    stage: str
+    # порядковый номер перестановки в этапе (с 1)
+    ordinal: int
+    tvs_number: str
+    reason: str
+
+    def __str__(self):
+        return f"{self.stage}, перестановка {self.ordinal}, ТВС {self.tvs_number}: {self.reason}"
+
+
+class OccupancyGrid:
+    """
+    Занятость ячеек: массив индексов ТВС на все координаты (мост, тележка), EMPTY - ячейка свободна
+    """
+
+    def __init__(self, tvs_hash: dict[str, "TVS"]):
+        """
+        :param tvs_hash: словарь, содержащий все ТВС (в исходных координатах, не мутирует)
+        """
+        self.numbers: list[str] = list(tvs_hash)
+        self.index: dict[str, int] = {number: i for i, number in enumerate(self.numbers)}
+        self.cells = array("i", [EMPTY]) * (GRID_SIDE * GRID_SIDE)
+        # ячейка каждой ТВС (EMPTY - ТВС вне сетки)
+        self.position = array("i", [EMPTY]) * len(self.numbers)
+        # ТВС, оказавшиеся в исходном состоянии в уже занятой ячейке
+        self.initial_conflicts: list[tuple[str, str]] = []
+
+        for number, tvs in tvs_hash.items():
+            cell = cell_index(tvs.most, tvs.tel)
+            if cell is None:
+                # ТВС вне АЗ и БВ не занимает ячейку
+                continue
+            if self.cells[cell] != EMPTY:
+                self.initial_conflicts.append((number, self.numbers[self.cells[cell]]))
+                continue
+            self.cells[cell] = self.index[number]
+            self.position[self.index[number]] = cell
+
+    def who_is_at(self, most: int, tel: int) -> Optional[str]:
+        """
+        Номер ТВС в ячейке (None - ячейка свободна или вне сетки)
+        """
+        cell = cell_index(most, tel)
+        i = EMPTY if cell is None else self.cells[cell]
+        return None if i == EMPTY else self.numbers[i]
+
+    def is_free(self, most: int, tel: int) -> bool:
+        return self.who_is_at(most, tel) is None
+
+    def on_grid(self, number: str) -> bool:
+        return self.position[self.index[number]] != EMPTY
+
+    def cell_of(self, number: str) -> Optional[str]:
+        """
+        Координаты ТВС в виде "мост-тележка" (None - ТВС вне сетки)
+        """
+        cell = self.position[self.index[number]]
+        return None if cell == EMPTY else f"{cell // GRID_SIDE}-{cell % GRID_SIDE}"
+
+    def section_of(self, number: str) -> Optional[str]:
+        """
+        Отсек, где стоит ТВС (по таблице SECTION_BY_MOST)
+        """
+        cell = self.position[self.index[number]]
+        return None if cell == EMPTY else SECTION_BY_MOST[cell // GRID_SIDE]
+
+    def move(self, number: str, new_most: int, new_tel: int):
+        """
+        Перемещает ТВС в ячейку (без проверок; проверки - см. validate_permutations)
+        """
+        i = self.index[number]
+        old_cell = self.position[i]
+        if old_cell != EMPTY and self.cells[old_cell] == i:
+            self.cells[old_cell] = EMPTY
+        new_cell = cell_index(new_most, new_tel)
+        if new_cell is None:
+            self.position[i] = EMPTY
+            return
+        self.cells[new_cell] = i
+        self.position[i] = new_cell
+
+
+def validate_permutations(
+        grid: OccupancyGrid,
+        stages: Iterable[tuple[str, Iterable["Permutation"]]]
+) -> list[Conflict]:
+    """
+    Прогоняет перестановки этапов (в порядке выполнения) по сетке занятости и собирает все конфликты.
+    Сетка мутирует: после проверки ТВС стоят на местах после всех перестановок.
+    :param grid: сетка занятости исходного состояния
+    :param stages: (название этапа, перестановки этапа) в порядке выполнения
+    :return: конфликты всех этапов
+    """
+    conflicts = []
+    for stage, permutations in stages:
+        for ordinal, permutation in enumerate(permutations, 1):
+            number = permutation.tvs_number
+            if number not in grid.index:
+                conflicts.append(Conflict(stage, ordinal, number, "ТВС отсутствует в файле состояния"))
+                continue
+            target = grid.who_is_at(permutation.new_most, permutation.new_tel)
+            if target is not None and target != number:
+                conflicts.append(Conflict(
+                    stage, ordinal, number,
+                    f"ячейка {permutation.new_most}-{permutation.new_tel} занята ТВС {target}"
+                ))
+            grid.move(number, permutation.new_most, permutation.new_tel)
+    return conflicts
+
+
+if __name__ == '__main__':
+
+    config = ReportConfig.from_input_dir(os.path.join(os.getcwd(), "input"))
+    tvs_hash, permutations = load_inputs(config)
+    grid = OccupancyGrid(tvs_hash)
+    for number, other in grid.initial_conflicts:
+        print(f"Исходное состояние: ТВС {number} и {other} в одной ячейке")
+
+    found = validate_permutations(grid, zip(STAGE_NAMES, permutations))
+    for item in found:
+        print(item)
+    print(f"Конфликтов: {len(found) + len(grid.initial_conflicts)}")
@@ -0,0 +1,269 @@
+"""
+Подбор дат начала этапов (этап 3, этап 5, вывоз ОТВС) в допустимых окнах, минимизирующих пиковое энерговыделение
+отсеков БВ. Окна задаются необязательными полями `input/controller.py`:
+
+stage_3_window = ("14.11.2025 11:00", "17.11.2025 11:00")  # самое раннее и самое позднее начало этапа 3
+stage_5_window = ("29.11.2025 10:00", "01.12.2025 10:00")
+otvs_window = ("03.12.2025 12:00", "06.12.2025 12:00")
+
+Длительность этапов сохраняется (как в `input/controller.py`), этапы без окна не сдвигаются.
+Поиск - покоординатный спуск по этапам: вклад этапа в энерговыделение отсеков для каждой даты начала вычисляется
+один раз и кэшируется, поэтому оценка расписания - это сложение готовых рядов, а не повторное моделирование.
+
+Запуск из командной строки:
+python3 optimizer.py
+"""
+import argparse
+import os
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from classes import TVS
+from constants import TIME_DATE_FORMAT
+from heat_engine import MergedCurve, day_number
+from report import ReportConfig, load_inputs
+from section_ledger import SectionLedger
+from services import Dates, Permutation, get_stage_windows, load_controller
+from simulator import TIMELINE_STEPS, get_report_dates, permutation_events, timeline_moments
+
+cur_dir = os.getcwd()
+input_dir = os.path.join(cur_dir, "input")
+
+STAGES = ("stage_3", "stage_5", "otvs")
+BV_SECTIONS = ("b03", "b01", "b02")
+
+
+@dataclass
+class Stage:
+    """
+    Этап ремонта с предвычисленными данными для быстрой оценки расписаний
+    """
+    name: str
+    permutations: list[Permutation]
+    begin: datetime
+    duration: timedelta
+    candidates: list[datetime]
+    numbers: set[str]
+    # prefix[отсек][k][g] - вклад первых k перестановок этапа в энерговыделение отсека в момент сетки g
+    prefix: dict[str, list[array]] = field(default_factory=dict)
+
+
+@dataclass
+class OptimizationResult:
+    begins: dict[str, datetime]
+    peaks: dict[str, float]
+    evaluations: int
+
+
+class ScheduleOptimizer:
+    """
+    Оценка и поиск расписаний этапов.
+    Энерговыделение отсека в момент сетки = вклад исходного состава + сумма вкладов этапов;
+    вклад этапа зависит только от даты его начала и кэшируется для каждой даты.
+    Этапы с общими ТВС не должны перекрываться во времени (иначе меняется порядок перемещений ТВС).
+    """
+
+    def __init__(
+            self,
+            tvs_hash: dict[str, TVS],
+            dates: Dates,
+            permutations: tuple[list[Permutation], list[Permutation], list[Permutation]],
+            windows: dict[str, tuple[datetime, datetime]],
+            resolution: str = "hour",
+            step: timedelta = timedelta(hours=1)
+    ):
+        """
+        :param tvs_hash: расшифрованный пул ТВС (не мутирует)
+        :param dates: даты справки и этапов (исходное расписание)
+        :param permutations: перестановки этапа 3, этапа 5 и вывоза ОТВС
+        :param windows: допустимые окна начала этапов (см. get_stage_windows)
+        :param resolution: шаг сетки, на которой ищется пик (см. TIMELINE_STEPS)
+        :param step: шаг перебора дат начала этапа внутри окна
+        """
+        report_dates = get_report_dates(dates)
+        self.grid = list(timeline_moments(report_dates[0], report_dates[-1] + timedelta(days=1), resolution))
+        grid_days = [day_number(moment) for moment in self.grid]
+
+        ledger = SectionLedger(tvs_hash)
+        self.base = {section: array("d", (ledger.heat(section, moment) for moment in self.grid))
+                     for section in BV_SECTIONS}
+
+        # энерговыделение каждой перемещаемой ТВС в моменты сетки
+        heat_rows: dict[str, array] = {}
+        # этапы выполняются последовательно: откуда и куда перемещается ТВС, определяется одним проходом
+        section_of = {number: tvs.get_section() for number, tvs in tvs_hash.items()}
+        zero_row = array("d", bytes(8 * len(self.grid)))
+
+        self.stages: list[Stage] = []
+        for name, stage_permutations in zip(STAGES, permutations):
+            begin = getattr(dates, f"{name}_begin")
+            end = getattr(dates, f"{name}_end")
+            earliest, latest = windows.get(name, (begin, begin))
+            candidates = []
+            candidate = earliest
+            while candidate <= latest:
+                candidates.append(candidate)
+                candidate += step
+
+            stage = Stage(
+                name,
+                stage_permutations,
+                begin,
+                end - begin,
+                candidates,
+                {permutation.tvs_number for permutation in stage_permutations}
+            )
+            rows = {section: [zero_row] for section in BV_SECTIONS}
+            for permutation in stage_permutations:
+                number = permutation.tvs_number
+                old_section = section_of[number]
+                new_section = TVS.section_by_most(permutation.new_most)
+                section_of[number] = new_section
+
+                if number not in heat_rows:
+                    curve = MergedCurve(ledger.breakpoints[number])
+                    heat_rows[number] = array("d", (curve(day) for day in grid_days))
+                heat = heat_rows[number]
+                for section in BV_SECTIONS:
+                    previous = rows[section][-1]
+                    if section == old_section == new_section or section not in (old_section, new_section):
+                        rows[section].append(previous)
+                    elif section == new_section:
+                        rows[section].append(array("d", map(float.__add__, previous, heat)))
+                    else:
+                        rows[section].append(array("d", map(float.__sub__, previous, heat)))
+            # отсеки, которые этап не затрагивает, не участвуют в оценке
+            stage.prefix = {section: section_rows for section, section_rows in rows.items()
+                            if any(row is not zero_row for row in section_rows)}
+            self.stages.append(stage)
+
+        # пары этапов с общими ТВС: более поздний этап начинается не раньше окончания более раннего
+        self.conflicts = [
+            (i, j)
+            for i in range(len(self.stages))
+            for j in range(i + 1, len(self.stages))
+            if self.stages[i].numbers & self.stages[j].numbers
+        ]
+        self._contributions: dict[tuple[str, datetime], dict[str, list[float]]] = {}
+        self.evaluations = 0
+
+    def _contribution(self, stage: Stage, begin: datetime) -> dict[str, list[float]]:
+        """
+        Вклад этапа с началом `begin` в энерговыделение отсеков в моменты сетки (кэшируется)
+        """
+        key = (stage.name, begin)
+        contribution = self._contributions.get(key)
+        if contribution is None:
+            times = [event.time for event in permutation_events(
+                stage.name, stage.permutations, begin, begin + stage.duration
+            )]
+            # число перестановок этапа, завершившихся раньше каждого момента сетки
+            counts = [bisect_left(times, moment) for moment in self.grid]
+            contribution = {
+                section: [rows[count][g] for g, count in enumerate(counts)]
+                for section, rows in stage.prefix.items()
+            }
+            self._contributions[key] = contribution
+        return contribution
+
+    def feasible(self, begins: dict[str, datetime]) -> bool:
+        """
+        Этапы с общими ТВС не перекрываются и идут в исходном порядке
+        """
+        for i, j in self.conflicts:
+            earlier, later = self.stages[i], self.stages[j]
+            if begins[earlier.name] + earlier.duration > begins[later.name]:
+                return False
+        return True
+
+    def evaluate(self, begins: dict[str, datetime]) -> dict[str, float]:
+        """
+        Пиковое энерговыделение отсеков БВ при заданных датах начала этапов
+        """
+        self.evaluations += 1
+        parts = [self._contribution(stage, begins[stage.name]) for stage in self.stages]
+        peaks = {}
+        for section in BV_SECTIONS:
+            columns = [self.base[section], *(part[section] for part in parts if section in part)]
+            peaks[section] = max(map(sum, zip(*columns)))
+        return peaks
+
+    def _partial_sums(self, begins: dict[str, datetime], excluded: Stage) -> dict[str, list[float]]:
+        """
+        Энерговыделение отсеков в моменты сетки без вклада этапа `excluded` (остальные этапы - по `begins`)
+        """
+        parts = [self._contribution(stage, begins[stage.name]) for stage in self.stages if stage is not excluded]
+        partial = {}
+        for section in BV_SECTIONS:
+            columns = [self.base[section], *(part[section] for part in parts if section in part)]
+            partial[section] = list(map(sum, zip(*columns)))
+        return partial
+
+    def optimize(self, begins: Optional[dict[str, datetime]] = None) -> OptimizationResult:
+        """
+        Покоординатный спуск: по очереди для каждого этапа выбирается лучшая дата начала в окне
+        при зафиксированных остальных, пока расписание улучшается.
+        Вклад зафиксированных этапов складывается один раз на этап, оценка кандидата - одно сложение рядов.
+        Критерий: наибольший из пиков отсеков, затем сумма пиков.
+        :param begins: начальное расписание (по умолчанию - из `input/controller.py`)
+        """
+        if begins is None:
+            begins = {stage.name: stage.begin for stage in self.stages}
+        best = (float("inf"), float("inf"))
+        if self.feasible(begins):
+            peaks = self.evaluate(begins)
+            best = (max(peaks.values()), sum(peaks.values()))
+
+        improved = True
+        while improved:
+            improved = False
+            for stage in self.stages:
+                partial = self._partial_sums(begins, stage)
+                partial_peaks = {section: max(partial[section]) for section in BV_SECTIONS}
+                for candidate in stage.candidates:
+                    trial = {**begins, stage.name: candidate}
+                    if candidate == begins[stage.name] or not self.feasible(trial):
+                        continue
+                    self.evaluations += 1
+                    contribution = self._contribution(stage, candidate)
+                    peaks = [
+                        max(map(float.__add__, partial[section], contribution[section]))
+                        if section in contribution else partial_peaks[section]
+                        for section in BV_SECTIONS
+                    ]
+                    score = (max(peaks), sum(peaks))
+                    if score < best:
+                        best, begins, improved = score, trial, True
+
+        return OptimizationResult(begins, self.evaluate(begins), self.evaluations)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Подбор дат этапов ремонта по пиковому энерговыделению отсеков БВ")
+    parser.add_argument("--resolution", choices=list(TIMELINE_STEPS), default="hour",
+                        help="шаг поиска пика энерговыделения (по умолчанию - час)")
+    parser.add_argument("--step", type=float, default=1, help="шаг перебора дат начала этапов, ч (по умолчанию - 1)")
+    args = parser.parse_args()
+
+    config = ReportConfig.from_input_dir(input_dir)
+    windows = get_stage_windows(load_controller(input_dir))
+    if not windows:
+        print("Не заданы окна этапов (`stage_3_window`, `stage_5_window`, `otvs_window`) в `input/controller.py`")
+    tvs_hash, permutations = load_inputs(config)
+
+    optimizer = ScheduleOptimizer(tvs_hash, config.dates, permutations, windows, args.resolution,
+                                  timedelta(hours=args.step))
+    initial_peaks = optimizer.evaluate({stage.name: stage.begin for stage in optimizer.stages})
+    result = optimizer.optimize()
+
+    print(f"Оценено расписаний: {result.evaluations}")
+    for stage in optimizer.stages:
+        begin = result.begins[stage.name]
+        print(f'{stage.name}_begin = "{datetime.strftime(begin, TIME_DATE_FORMAT)}"')
+        print(f'{stage.name}_end = "{datetime.strftime(begin + stage.duration, TIME_DATE_FORMAT)}"')
+    for section in BV_SECTIONS:
+        print(f"Пик {section}: {round(initial_peaks[section], 1)} -> {round(result.peaks[section], 1)}")
@@ -0,0 +1,219 @@
+"""
+Подбор ОТВС на вывоз: индекс ТВС отсеков БВ, упорядоченный по дате окончания последней кампании (выдержке).
+Запрос "N наименее энерговыделяющих ТВС отсека с выдержкой не меньше заданной на дату D": при первом запросе
+на дату D ТВС отсека один раз упорядочиваются по энерговыделению на D (расчет по кривой для каждой ТВС отсека),
+порядок кэшируется; последующие запросы на ту же дату (в т.ч. с другой выдержкой и другим N) просматривают
+кэшированный порядок с начала и останавливаются на N-й подходящей ТВС, не рассчитывая энерговыделение заново.
+Индекс и кэшированные порядки обновляются при перемещении ТВС (move / apply), как учет отсеков SectionLedger.
+Подобранные ТВС распределяются по контейнерам, перестановки всех контейнеров записываются в файл МП
+за один проход (write_mp_data).
+
+Запуск из командной строки (24 ТВС из отсека b02 с выдержкой не меньше 3 лет на начало вывоза ОТВС):
+python3 otvs_selection.py --section b02 --count 24 --min-cooling-days 1095
+"""
+import argparse
+import os
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from itertools import count
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from classes import Container, write_mp_data
+from constants import EXPOSURE_DAYS, TIME_DATE_FORMAT
+from container_packing import CONTAINER_CELLS, pack_tvs
+from heat_engine import get_last_campaign_end
+from report import ReportConfig, load_inputs
+from section_ledger import SECTIONS
+
+if TYPE_CHECKING:
+    from classes import TVS
+    from services import Permutation
+
+# отсеки БВ, из которых вывозятся ОТВС
+BV_SECTIONS = tuple(section for section in SECTIONS if section != "az")
+
+
+def heat_at(tvs: "TVS", end: datetime, date: datetime) -> float:
+    """
+    Энерговыделение ТВС на дату (как TVS.calculate_heat, без предупреждений; вне кривой - 0)
+    """
+    exposure = (date - end).days
+    if exposure < EXPOSURE_DAYS[0] or exposure > EXPOSURE_DAYS[-1]:
+        return 0.0
+    return tvs.heat_curve(exposure)
+
+
+class CandidateIndex:
+    """
+    ТВС отсеков БВ по отсекам: отсортированные списки (дата окончания последней кампании, номер ТВС)
+    """
+
+    def __init__(self, tvs_hash: dict[str, "TVS"]):
+        """
+        :param tvs_hash: словарь, содержащий все ТВС (координаты ТВС меняются через move)
+        """
+        self.tvs_hash = tvs_hash
+        self.sections: dict[str, list[tuple[datetime, str]]] = {section: [] for section in BV_SECTIONS}
+        # отсек и ключ индекса каждой ТВС, находящейся в индексе
+        self.keys: dict[str, tuple[str, tuple[datetime, str]]] = {}
+        self.ends: dict[str, Optional[datetime]] = {}
+        # кэш порядков: (отсек, дата) -> отсортированный список (энерговыделение на дату, дата окончания кампании, номер)
+        self.orders: dict[tuple[str, datetime], list[tuple[float, datetime, str]]] = {}
+
+        for number, tvs in tvs_hash.items():
+            end = self.ends[number] = get_last_campaign_end(tvs)
+            section = tvs.get_section()
+            if section in self.sections and end is not None:
+                self.sections[section].append((end, number))
+                self.keys[number] = (section, (end, number))
+        for items in self.sections.values():
+            items.sort()
+
+    def _add(self, number: str):
+        section = self.tvs_hash[number].get_section()
+        end = self.ends[number]
+        if section in self.sections and end is not None:
+            item = (end, number)
+            insort(self.sections[section], item)
+            self.keys[number] = (section, item)
+            for (order_section, date), order in self.orders.items():
+                if order_section == section:
+                    insort(order, (heat_at(self.tvs_hash[number], end, date), end, number))
+
+    def _remove(self, number: str):
+        if number not in self.keys:
+            return
+        section, item = self.keys.pop(number)
+        items = self.sections[section]
+        del items[bisect_left(items, item)]
+        end = item[0]
+        for (order_section, date), order in self.orders.items():
+            if order_section == section:
+                del order[bisect_left(order, (heat_at(self.tvs_hash[number], end, date), end, number))]
+
+    def move(self, number: str, new_most: int, new_tel: int):
+        """
+        Перемещает ТВС в новые координаты (мутирует ТВС в `tvs_hash`) и обновляет индекс
+        """
+        tvs = self.tvs_hash[number]
+        self._remove(number)
+        tvs.most = new_most
+        tvs.tel = new_tel
+        self._add(number)
+
+    def apply(self, permutations: Iterable["Permutation"]):
+        """
+        Выполняет перестановки (например, файла МП) по порядку
+        """
+        for permutation in permutations:
+            self.move(permutation.tvs_number, permutation.new_most, permutation.new_tel)
+
+    def eligible(self, section: str, date: datetime, min_cooling_days: int) -> list[tuple[datetime, str]]:
+        """
+        ТВС отсека с выдержкой на дату `date` не меньше `min_cooling_days` суток (бинарный поиск по индексу)
+        """
+        cutoff = date - timedelta(days=min_cooling_days)
+        items = self.sections[section]
+        return items[:bisect_right(items, cutoff, key=lambda item: item[0])]
+
+    def order(self, section: str, date: datetime) -> list[tuple[float, datetime, str]]:
+        """
+        ТВС отсека по возрастанию энерговыделения на дату `date` (при равенстве - по дате окончания кампании и номеру).
+        Первый вызов на дату рассчитывает энерговыделение всех ТВС отсека (O(m log m), m - число ТВС отсека),
+        далее порядок берется из кэша и поддерживается при перемещениях ТВС (move)
+        """
+        key = (section, date)
+        if key not in self.orders:
+            self.orders[key] = sorted(
+                (heat_at(self.tvs_hash[number], end, date), end, number) for end, number in self.sections[section]
+            )
+        return self.orders[key]
+
+    def select(self, section: str, number_of_tvs: int, date: datetime, min_cooling_days: int) -> list["TVS"]:
+        """
+        `number_of_tvs` ТВС отсека с наименьшим энерговыделением на дату `date` среди ТВС с достаточной выдержкой:
+        кэшированный порядок на дату (order) просматривается до `number_of_tvs`-й ТВС с достаточной выдержкой.
+        Просматриваются только ТВС с меньшим энерговыделением, чем у последней подобранной
+        (при малой выдержке - немногим более `number_of_tvs`)
+        :return: ТВС по возрастанию энерговыделения (TVS.heat задается на дату `date`)
+        """
+        cutoff = date - timedelta(days=min_cooling_days)
+        result = []
+        for heat, end, number in self.order(section, date):
+            if len(result) == number_of_tvs:
+                break
+            if end > cutoff:
+                continue
+            tvs = self.tvs_hash[number]
+            tvs.heat = heat
+            result.append(tvs)
+        return result
+
+
+def load_containers(
+        tvs_lst: list["TVS"],
+        heat_limit: Optional[float] = None,
+        first_number: int = 1
+) -> list[Container]:
+    """
+    Распределяет ТВС по контейнерам: с ограничением энерговыделения - см. container_packing.pack_tvs,
+    иначе по порядку, по CONTAINER_CELLS ТВС в контейнер
+    """
+    if heat_limit is not None:
+        return pack_tvs(tvs_lst, heat_limit, first_number).containers
+
+    containers = []
+    for i in range(0, len(tvs_lst), CONTAINER_CELLS):
+        container = Container(first_number + len(containers))
+        container.tvs_lst = tvs_lst[i:i + CONTAINER_CELLS]
+        container.calculate_heat()
+        container.fill_cells()
+        containers.append(container)
+    return containers
+
+
+def write_otvs_mp(containers: list[Container], index: CandidateIndex, mp_file: str, first_operation: int = 1):
+    """
+    Записывает перестановки в контейнеры в файл МП за один проход (write_mp_data) и выполняет их в индексе:
+    вывезенные ТВС больше не подбираются
+    """
+    write_mp_data(containers, count(first_operation), mp_file)
+    for container in containers:
+        for cell in container.loaded_cells():
+            index.move(cell.tvs.number, int(f"100{container.number}"), cell.number)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Подбор ОТВС на вывоз и формирование файла МП")
+    parser.add_argument("--section", choices=BV_SECTIONS, required=True, help="отсек БВ")
+    parser.add_argument("--count", type=int, required=True, help="число ТВС на вывоз")
+    parser.add_argument("--min-cooling-days", type=int, default=0, help="минимальная выдержка, сут (по умолчанию - 0)")
+    parser.add_argument("--date", default=None,
+                        help="дата подбора, дд.мм.гггг чч:мм (по умолчанию - начало вывоза ОТВС)")
+    parser.add_argument("--limit", type=float, default=None,
+                        help="допустимое энерговыделение контейнера (по умолчанию - контейнеры по 12 ТВС)")
+    parser.add_argument("--first-number", type=int, default=1, help="номер первого контейнера (по умолчанию - 1)")
+    parser.add_argument("--output", default=os.path.join(os.getcwd(), "output", "otvs.mp"), help="файл МП")
+    args = parser.parse_args()
+
+    config = ReportConfig.from_input_dir(os.path.join(os.getcwd(), "input"))
+    date = config.dates.otvs_begin if args.date is None else datetime.strptime(args.date, TIME_DATE_FORMAT)
+    tvs_hash, permutations = load_inputs(config)
+
+    # состав отсеков на начало вывоза - после перестановок этапов 3 и 5
+    index = CandidateIndex(tvs_hash)
+    stage_3_permutations, stage_5_permutations, _ = permutations
+    index.apply(stage_3_permutations)
+    index.apply(stage_5_permutations)
+
+    tvs_lst = index.select(args.section, args.count, date, args.min_cooling_days)
+    if len(tvs_lst) < args.count:
+        print(f"В отсеке {args.section} подходящих ТВС: {len(tvs_lst)} (запрошено {args.count})")
+
+    containers = load_containers(tvs_lst, args.limit, args.first_number)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    write_otvs_mp(containers, index, args.output)
+    for container in containers:
+        print(container)
+    print(f"Файл МП сохранен: {args.output}")
@@ -0,0 +1,137 @@
+"""
+Долгосрочный прогноз остаточного энерговыделения отсеков (1-30 лет) для планирования заполнения БВ.
+Кривые ТВС каждого отсека сводятся в одну кусочно-линейную функцию даты (см. merge_curves), поэтому значение
+на любую дату - бинарный поиск, без пошагового расчета по суткам и без предупреждений по каждой ТВС на каждый шаг.
+
+Запуск из командной строки (прогноз на 30 лет с шагом в месяц от состояния после ремонта):
+python3 projection.py --years 30 --step month
+"""
+import argparse
+import calendar
+import os
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Iterator, Literal
+
+from heat_engine import merge_curves
+from report import ReportConfig, load_inputs
+from section_ledger import SECTIONS, SectionLedger
+from simulator import Simulator, Snapshot, outage_events, write_timeline
+
+if TYPE_CHECKING:
+    from classes import TVS
+
+cur_dir = os.getcwd()
+input_dir = os.path.join(cur_dir, "input")
+output_dir = os.path.join(cur_dir, "output")
+projection_file = os.path.join(output_dir, "projection.csv")
+
+PROJECTION_STEPS = ("day", "month", "year")
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    """
+    Сдвигает дату на `months` календарных месяцев (число месяца ограничивается длиной месяца)
+    """
+    month_index = moment.month - 1 + months
+    year, month = moment.year + month_index // 12, month_index % 12 + 1
+    day = min(moment.day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day)
+
+
+def projection_moments(start: datetime, end: datetime, step: Literal["day", "month", "year"]) -> Iterator[datetime]:
+    """
+    Моменты прогноза от `start` до `end` включительно с шагом сутки, месяц или год
+    """
+    i = 0
+    moment = start
+    while moment <= end:
+        yield moment
+        i += 1
+        match step:
+            case "day":
+                moment = start + timedelta(days=i)
+            case "month":
+                moment = add_months(start, i)
+            case _:
+                moment = add_months(start, 12 * i)
+
+
+def project_heat(
+        tvs_hash: dict[str, "TVS"],
+        start: datetime,
+        end: datetime,
+        step: Literal["day", "month", "year"] = "month",
+        beyond: Literal["zero", "hold"] = "zero"
+) -> list[Snapshot]:
+    """
+    Прогноз энерговыделения отсеков при неизменном составе отсеков
+    :param tvs_hash: словарь, содержащий все ТВС (в текущих координатах)
+    :param start: начало прогноза
+    :param end: конец прогноза
+    :param step: шаг прогноза
+    :param beyond: энерговыделение ТВС с выдержкой более 30 лет: "zero" - 0 (как в справке), "hold" - сохраняется
+    значение последней точки кривой
+    :return: снимки состояния отсеков на моменты прогноза
+    """
+    members = {section: [] for section in SECTIONS}
+    for tvs in tvs_hash.values():
+        section = tvs.get_section()
+        if section is not None:
+            members[section].append(tvs)
+
+    counts = {section: len(members[section]) for section in SECTIONS}
+    curves = {section: merge_curves(members[section], beyond) for section in SECTIONS}
+    # после обнуления всех кривых отсека в сумме остается погрешность округления порядка 1e-12 (в т.ч. отрицательная)
+    return [
+        Snapshot(moment, dict(counts), {section: max(0.0, curves[section].at(moment)) for section in SECTIONS})
+        for moment in projection_moments(start, end, step)
+    ]
+
+
+def run_projection(
+        config: ReportConfig,
+        years: int = 30,
+        step: Literal["day", "month", "year"] = "month",
+        beyond: Literal["zero", "hold"] = "zero",
+        after_outage: bool = True
+) -> list[Snapshot]:
+    """
+    Прогноз энерговыделения отсеков на `years` лет
+    :param config: даты и входные файлы (как для справки)
+    :param years: горизонт прогноза, лет
+    :param step: шаг прогноза
+    :param beyond: энерговыделение ТВС с выдержкой более 30 лет (см. project_heat)
+    :param after_outage: прогноз от состояния после всех перестановок ремонта (с суток, следующих за концом справки);
+    иначе - от исходного состояния с начальной даты справки
+    """
+    tvs_hash, permutations = load_inputs(config)
+    start = config.dates.begin_date
+    if after_outage:
+        start = config.dates.end_date + timedelta(days=1)
+        simulator = Simulator(SectionLedger(tvs_hash), outage_events(config.dates, *permutations))
+        simulator.advance(start)
+    return project_heat(tvs_hash, start, add_months(start, 12 * years), step, beyond)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Долгосрочный прогноз энерговыделения отсеков")
+    parser.add_argument("--years", type=int, default=30, help="горизонт прогноза, лет (по умолчанию - 30)")
+    parser.add_argument("--step", choices=PROJECTION_STEPS, default="month", help="шаг прогноза (по умолчанию - месяц)")
+    parser.add_argument("--hold", action="store_true",
+                        help="сохранять энерговыделение ТВС с выдержкой более 30 лет (по умолчанию - 0, как в справке)")
+    parser.add_argument("--from-initial", action="store_true",
+                        help="прогноз от исходного состояния (по умолчанию - от состояния после ремонта)")
+    args = parser.parse_args()
+
+    config = ReportConfig.from_input_dir(input_dir)
+    snapshots = run_projection(
+        config,
+        args.years,
+        args.step,
+        "hold" if args.hold else "zero",
+        not args.from_initial
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    write_timeline(snapshots, projection_file)
+    print(f"Прогноз сохранен: {projection_file}")
@@ -0,0 +1,132 @@
+"""
+В данном модуле представлен кодек чисел формата Real48 Delphi (6 байт, little-endian):
+    байт 0 - экспонента со смещением 129 (0 => число равно 0),
+    байты 1-5 - 39 бит дробной части мантиссы (неявная единица перед двоичной точкой),
+    старший бит байта 5 - знак.
+Расшифровка выполняется целочисленно: значение = (2^39 + дробная часть) * 2^(экспонента - 168).
+Мантисса и степень двойки представимы в double точно, поэтому результат побитово совпадает
+с поразрядной расшифровкой (services.parse_real48).
+"""
+import sys
+from array import array
+from functools import lru_cache
+from math import frexp, isfinite
+from typing import Iterable, Sequence
+
+REAL48_SIZE = 6
+
+# множитель 2^(exp - 168) по индексу [экспонента | знак << 8], при экспоненте 0 число равно 0
+_SCALE = (
+    [0.0] + [2.0 ** (exp - 168) for exp in range(1, 256)]
+    + [0.0] + [-2.0 ** (exp - 168) for exp in range(1, 256)]
+)
+_IMPLICIT_ONE = 1 << 39
+
+
+def decode_real48(real48: Sequence[int]) -> float:
+    """
+    Преобразует 6 байт формата Real48 в число float
+    :param real48: bytes / memoryview / list длиной 6
+    :return: float
+    """
+    if len(real48) != REAL48_SIZE:
+        raise ValueError("Массив real48 должен содержать ровно 6 байт")
+    value = int.from_bytes(real48, "little")
+    return ((value >> 8) & 0x7FFFFFFFFF | _IMPLICIT_ONE) * _SCALE[value & 0xFF | (value >> 39) & 0x100]
+
+
+@lru_cache(maxsize=8)
+def _lane_ones(count: int) -> int:
+    """
+    Целое из `count` 8-байтовых ячеек, в каждой из которых записана 1 (основа констант decode_real48_column)
+    """
+    return int.from_bytes(b"\x01\x00\x00\x00\x00\x00\x00\x00" * count, "little")
+
+
+def decode_real48_column(data, offset: int, stride: int, count: int) -> array:
+    """
+    Пакетная расшифровка столбца чисел Real48: `count` чисел, расположенных в `data` с шагом `stride`,
+    начиная с `offset` (например, одно поле Real48 всех записей пула).
+    Числа раскладываются по 8-байтовым ячейкам одного большого целого (срезами с шагом, без цикла по числам),
+    затем экспонента, мантисса и знак всех ячеек сразу переносятся в формат double сдвигами и масками:
+    double = знак << 63 | (экспонента + 894) << 52 | дробная часть << 13, ячейки с экспонентой 0 обнуляются.
+    Преобразование точное, результат побитово совпадает с decode_real48.
+    :param data: bytes-like (формат 'B')
+    :param offset: смещение первого числа
+    :param stride: шаг между числами (размер записи)
+    :param count: количество чисел
+    :return: array('d')
+    """
+    column = array("d")
+    if count == 0:
+        return column
+
+    # срез bytes с шагом - копирование в C, срез memoryview с шагом заметно медленнее
+    data = data if isinstance(data, bytes) else bytes(data)
+    lanes = bytearray(8 * count)
+    for i in range(REAL48_SIZE):
+        start = offset + i
+        lanes[i::8] = data[start:start + stride * (count - 1) + 1:stride]
+    value = int.from_bytes(lanes, "little")
+
+    ones = _lane_ones(count)
+    exps = value & ones * 0xFF
+    fractions = (value >> 8) & ones * 0x7FFFFFFFFF
+    signs = (value >> 47) & ones
+    # 1 в ячейках с ненулевой экспонентой
+    nonzero = ((exps + ones * 0xFF) >> 8) & ones
+
+    bits = (signs << 63 | (exps + ones * 894) << 52 | fractions << 13) & nonzero * 0xFFFFFFFFFFFFFFFF
+    column.frombytes(bits.to_bytes(8 * count, "little"))
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def decode_real48_many(values: Iterable[Sequence[int]]) -> array:
+    """
+    Пакетная расшифровка последовательности чисел Real48
+    :param values: последовательность 6-байтовых чисел Real48
+    :return: array('d')
+    """
+    return array("d", [decode_real48(real48) for real48 in values])
+
+
+def encode_real48(value: float) -> bytes:
+    """
+    Преобразует число float в 6 байт формата Real48 (операция, обратная decode_real48).
+    Мантисса округляется до 39 бит (к ближайшему), числа меньше наименьшего представимого в Real48
+    записываются как 0.
+    :param value: кодируемое значение
+    :return: bytes длиной 6
+    """
+    if value == 0:
+        return bytes(REAL48_SIZE)
+    if not isfinite(value):
+        raise ValueError(f"Значение {value} непредставимо в формате Real48")
+
+    # |value| = mantissa * 2^exponent, 0.5 <= mantissa < 1 => |value| = (1 + fraction) * 2^(exponent - 1)
+    mantissa, exponent = frexp(abs(value))
+    fraction = round((mantissa * 2.0 - 1.0) * _IMPLICIT_ONE)
+    exponent += 128  # смещение (bias) 129 для экспоненты при мантиссе в диапазоне [1, 2)
+    if fraction == _IMPLICIT_ONE:
+        # округление мантиссы до следующей степени двойки
+        fraction = 0
+        exponent += 1
+
+    if exponent > 255:
+        raise OverflowError(f"Значение {value} превышает диапазон формата Real48")
+    if exponent < 1:
+        return bytes(REAL48_SIZE)
+
+    sign = 1 << 47 if value < 0 else 0
+    return (exponent | fraction << 8 | sign).to_bytes(REAL48_SIZE, "little")
+
+
+def encode_real48_many(values: Iterable[float]) -> list[bytes]:
+    """
+    Пакетное кодирование последовательности чисел в формат Real48
+    :param values: кодируемые значения
+    :return: list[bytes] - 6-байтовые числа Real48
+    """
+    return [encode_real48(value) for value in values]
@@ -0,0 +1,167 @@
+"""
+В данном модуле представлен программный интерфейс расчета справки: run_report(config) -> Report.
+Даты и пути к файлам передаются явно (ReportConfig), импорт модулей не требует `input/controller.py`,
+а модули оформления (odfpy) загружаются только при сохранении итоговой таблицы (Report.render).
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from constants import CHUNK_SIZE, DATE_FORMAT
+from section_ledger import SectionLedger
+from services import Dates, Day, Permutation, get_dates, get_timeline_resolution, load_controller, load_permutations
+from simulator import Checkpoint, Simulator, Snapshot, get_report_dates, outage_events, write_timeline
+from topaz_file_handler import load_tvs_pool
+
+if TYPE_CHECKING:
+    from classes import TVS
+
+TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "template", "table.odt")
+
+
+@dataclass
+class ReportConfig:
+    """
+    Исходные данные справки: даты этапов и расположение входных файлов
+    """
+    dates: Dates
+    initial_state_file: str
+    stage_3_file: str
+    stage_5_file: str
+    otvs_file: str
+    permutations_file: str
+    chunk_size: int = CHUNK_SIZE
+    timeline_resolution: Optional[str] = None
+
+    @classmethod
+    def from_input_dir(cls, input_dir: str) -> "ReportConfig":
+        """
+        Конфигурация по стандартной раскладке директории `input` (файлы ТОПАЗ и МП, `controller.py`)
+        """
+        controller = load_controller(input_dir)
+        return cls(
+            dates=get_dates(controller),
+            initial_state_file=os.path.join(input_dir, "initial_state"),
+            stage_3_file=os.path.join(input_dir, "stage_3.mp"),
+            stage_5_file=os.path.join(input_dir, "stage_5.mp"),
+            otvs_file=os.path.join(input_dir, "otvs.mp"),
+            permutations_file=os.path.join(input_dir, "permutations.txt"),
+            timeline_resolution=get_timeline_resolution(controller),
+        )
+
+
+@dataclass
+class Report:
+    """
+    Результат расчета: суточная справка и (при заданном шаге) временная шкала внутри суток
+    """
+    dates: Dates
+    days: list[Day]
+    timeline: list[Snapshot] = field(default_factory=list)
+    # контрольные точки моделирования по датам справки (см. run_report, resume_report)
+    checkpoints: dict[datetime, Checkpoint] = field(default_factory=dict)
+
+    @property
+    def summary(self) -> dict[str, str]:
+        """
+        Общая информация для шапки итоговой таблицы: номер блока, даты начала и конца
+        """
+        return {
+            "block": self.dates.block_number,
+            "begin": datetime.strftime(self.dates.begin_date, DATE_FORMAT),
+            "end": datetime.strftime(self.dates.end_date, DATE_FORMAT)
+        }
+
+    @property
+    def table_data(self) -> list[list[str]]:
+        """
+        Строки итоговой таблицы
+        """
+        table_data = []
+        for day in self.days:
+            row = [
+                f"{datetime.strftime(day.date, DATE_FORMAT)}",
+                f"{day.count_az} / {round(day.heat_az, 1)}",
+                f"{day.count_b03} / {round(day.heat_b03, 1)}",
+                f"{day.count_b01} / {round(day.heat_b01, 1)}",
+                f"{day.count_b02} / {round(day.heat_b02, 1)}",
+                f"{day.comment}"
+            ]
+            table_data.append(row)
+        return table_data
+
+    def render(self, output_dir: str, template: str = TEMPLATE_FILE):
+        """
+        Заполняет итоговую таблицу (и временную шкалу, если она рассчитана) в папке `output_dir`
+        """
+        # odfpy нужен только для оформления таблицы
+        from table_handler import fill_table
+
+        fill_table(self.table_data, self.summary, output_dir, template)
+        if self.timeline:
+            write_timeline(self.timeline, os.path.join(output_dir, "timeline.csv"))
+
+
+def load_inputs(
+        config: ReportConfig
+) -> (dict[str, "TVS"], tuple[list[Permutation], list[Permutation], list[Permutation]]):
+    """
+    Читает исходное состояние ТВС (с кэшированием расшифровки) и перестановки этапов
+    :return: пул ТВС, (перестановки этапа 3, этапа 5, вывоза ОТВС)
+    """
+    # расшифрованный пул кэшируется рядом с файлом состояния: повторные запуски не разбирают файл ТОПАЗ
+    tvs_hash, _ = load_tvs_pool(config.initial_state_file, config.chunk_size)
+    permutations = load_permutations(
+        config.stage_3_file,
+        config.stage_5_file,
+        config.otvs_file,
+        config.permutations_file
+    )
+    return tvs_hash, permutations
+
+
+def run_report(
+        config: ReportConfig,
+        checkpoint_dates: Iterable[datetime] = (),
+        inputs: Optional[tuple[dict[str, "TVS"], tuple[list[Permutation], ...]]] = None
+) -> Report:
+    """
+    Рассчитывает справку по энерговыделению в отсеках
+    :param config: даты и входные файлы
+    :param checkpoint_dates: даты справки, после которых сохраняются контрольные точки (Report.checkpoints)
+    :param inputs: уже прочитанные пул ТВС и перестановки (см. load_inputs); по умолчанию читаются из файлов.
+    Координаты ТВС пула мутируют: после расчета ТВС стоят на местах на конец справки
+    (повторный расчет с начала - через контрольную точку на первую дату справки и resume_report)
+    :return: Report
+    """
+    tvs_hash, permutations = load_inputs(config) if inputs is None else inputs
+
+    # время каждой перестановки известно заранее: потоки этапов сливаются в один поток событий по времени
+    events = outage_events(config.dates, *permutations)
+
+    # учет содержимого отсеков: состав и суммарная кривая энерговыделения обновляются при каждой перестановке
+    simulator = Simulator(SectionLedger(tvs_hash), events)
+    days, timeline = simulator.run(get_report_dates(config.dates), config.timeline_resolution, checkpoint_dates)
+    return Report(config.dates, days, timeline, simulator.checkpoints)
+
+
+def resume_report(
+        config: ReportConfig,
+        checkpoint: Checkpoint,
+        inputs: tuple[dict[str, "TVS"], tuple[list[Permutation], ...]]
+) -> Report:
+    """
+    Досчитывает справку с контрольной точки (вариант "что если"): общая часть до точки не повторяется.
+    Изменения исходных данных (например, `otvs.mp` или `otvs_begin` в `config`) должны касаться перестановок
+    после контрольной точки, иначе - CheckpointMismatchError.
+    :param config: даты и входные файлы варианта
+    :param checkpoint: контрольная точка (из Report.checkpoints)
+    :param inputs: пул ТВС, на котором получена контрольная точка, и перестановки варианта
+    :return: Report со строками справки до и после контрольной точки
+    """
+    tvs_hash, permutations = inputs
+    simulator = Simulator.resume(checkpoint, tvs_hash, outage_events(config.dates, *permutations))
+    report_dates = [today for today in get_report_dates(config.dates) if today >= checkpoint.time]
+    days, timeline = simulator.run(report_dates, config.timeline_resolution)
+    return Report(config.dates, days, timeline)
@@ -0,0 +1,220 @@
+"""
+Пакетный расчет сценариев ремонта: файл состояния ТОПАЗ и файлы МП разбираются один раз,
+сценарии (наборы дат этапов) моделируются параллельно в нескольких процессах,
+итог - таблица пикового энерговыделения по отсекам для каждого сценария.
+
+Файл сценариев - JSON-список объектов с полем "name" и любыми полями дат из `input/controller.py`, например:
+[
+    {"name": "базовый"},
+    {"name": "этап 3 на сутки раньше", "stage_3_begin": "14.11.2025 11:00"}
+]
+Незаданные поля берутся из `input/controller.py`; если задано только начало этапа, этап сдвигается целиком
+(длительность сохраняется).
+
+Запуск из командной строки:
+python3 scenarios.py input/scenarios.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from constants import TIME_DATE_FORMAT
+from report import ReportConfig, load_inputs
+from section_ledger import SECTIONS, SectionLedger
+from services import DATE_FIELDS, Dates, Permutation, parse_dates
+from simulator import TIMELINE_RESOLUTIONS, Simulator, get_report_dates, outage_events
+
+if TYPE_CHECKING:
+    from classes import TVS
+
+cur_dir = os.getcwd()
+input_dir = os.path.join(cur_dir, "input")
+output_dir = os.path.join(cur_dir, "output")
+scenarios_result_file = os.path.join(output_dir, "scenarios.csv")
+
+STAGES = ("stage_3", "stage_5", "otvs")
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    peaks: dict[str, float]
+    peak_times: dict[str, datetime]
+
+
+# разобранные данные для процессов-исполнителей: заполняются в родительском процессе до создания пула
+# и наследуются исполнителями при fork без сериализации (без fork - передаются один раз на процесс)
+_shared = {}
+
+
+def read_scenarios(file_path: str, base_dates: Dates) -> list[tuple[str, Dates]]:
+    """
+    Читает файл сценариев
+    :param file_path: JSON-файл сценариев
+    :param base_dates: даты из `input/controller.py` (для незаданных полей)
+    :return: list[(название сценария, даты сценария)]
+    """
+    with open(file_path, encoding="utf-8") as file:
+        raw_scenarios = json.load(file)
+
+    scenarios = []
+    for i, raw in enumerate(raw_scenarios):
+        name = str(raw.get("name", i + 1))
+        fields = {}
+        for field_name, date_format in DATE_FIELDS.items():
+            fields[field_name] = datetime.strftime(getattr(base_dates, field_name), date_format)
+        fields.update({key: value for key, value in raw.items() if key in DATE_FIELDS})
+
+        # сдвиг начала этапа без явного конца сохраняет длительность этапа
+        for stage in STAGES:
+            begin, end = f"{stage}_begin", f"{stage}_end"
+            if begin in raw and end not in raw:
+                duration = getattr(base_dates, end) - getattr(base_dates, begin)
+                shifted_end = datetime.strptime(raw[begin], TIME_DATE_FORMAT) + duration
+                fields[end] = datetime.strftime(shifted_end, TIME_DATE_FORMAT)
+
+        scenarios.append((name, parse_dates(base_dates.block_number, fields, f"сценарии `{name}` файла {file_path}")))
+    return scenarios
+
+
+def _share(
+        tvs_hash: dict[str, "TVS"],
+        permutations: tuple[list[Permutation], list[Permutation], list[Permutation]],
+        resolution: Optional[str]
+):
+    """
+    Подготовка данных сценариев (_shared): исходные координаты ТВС и точки излома кривых вычисляются один раз
+    """
+    _shared["tvs_hash"] = tvs_hash
+    _shared["positions"] = {number: (tvs.most, tvs.tel) for number, tvs in tvs_hash.items()}
+    _shared["breakpoints"] = SectionLedger(tvs_hash).breakpoints
+    _shared["permutations"] = permutations
+    _shared["resolution"] = resolution
+
+
+def run_scenario(name: str, dates: Dates) -> ScenarioResult:
+    """
+    Моделирует один сценарий в процессе-исполнителе (см. _share)
+    """
+    tvs_hash = _shared["tvs_hash"]
+    # каждый сценарий начинается с исходного состояния
+    for number, (most, tel) in _shared["positions"].items():
+        tvs = tvs_hash[number]
+        tvs.most = most
+        tvs.tel = tel
+
+    ledger = SectionLedger(tvs_hash, _shared["breakpoints"])
+    simulator = Simulator(ledger, outage_events(dates, *_shared["permutations"]))
+    resolution = _shared["resolution"]
+    days, timeline = simulator.run(get_report_dates(dates), resolution)
+
+    if resolution is None:
+        states = ((day.date, {section: getattr(day, f"heat_{section}") for section in SECTIONS}) for day in days)
+    else:
+        states = ((state.time, state.heats) for state in timeline)
+    return find_peaks(name, states)
+
+
+def find_peaks(name: str, states: Iterable[tuple[datetime, dict[str, float]]]) -> ScenarioResult:
+    """
+    Пиковое энерговыделение каждого отсека и момент, когда оно достигается (первый из равных)
+    """
+    peaks = {section: 0.0 for section in SECTIONS}
+    peak_times = {section: None for section in SECTIONS}
+    for time, heats in states:
+        for section in SECTIONS:
+            if peak_times[section] is None or heats[section] > peaks[section]:
+                peaks[section] = heats[section]
+                peak_times[section] = time
+    return ScenarioResult(name, peaks, peak_times)
+
+
+def run_scenarios(
+        scenarios: list[tuple[str, Dates]],
+        tvs_hash: dict[str, "TVS"],
+        permutations: tuple[list[Permutation], list[Permutation], list[Permutation]],
+        resolution: Optional[str] = "hour",
+        workers: Optional[int] = None
+) -> list[ScenarioResult]:
+    """
+    Моделирует сценарии в пуле процессов
+    :param scenarios: list[(название, даты)]
+    :param tvs_hash: расшифрованный пул ТВС (не мутирует; при fork наследуется процессами, иначе передается
+        один раз на процесс)
+    :param permutations: перестановки этапа 3, этапа 5 и вывоза ОТВС
+    :param resolution: шаг поиска пика (см. TIMELINE_RESOLUTIONS); None - по суточной справке
+    :param workers: число процессов (по умолчанию - число ядер)
+    :return: результаты в порядке сценариев
+    """
+    workers = min(workers or os.cpu_count() or 1, len(scenarios)) or 1
+    if "fork" in multiprocessing.get_all_start_methods():
+        # данные готовятся в текущем процессе, исполнители получают их копией памяти при fork
+        _share(tvs_hash, permutations, resolution)
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_share,
+            initargs=(tvs_hash, permutations, resolution)
+        )
+    try:
+        with executor:
+            names = [name for name, _ in scenarios]
+            scenario_dates = [dates for _, dates in scenarios]
+            return list(executor.map(run_scenario, names, scenario_dates))
+    finally:
+        _shared.clear()
+
+
+def write_results(results: list[ScenarioResult], file_path: str):
+    """
+    Печатает таблицу сравнения сценариев и сохраняет ее в csv-файл
+    """
+    header = ["scenario"]
+    for section in SECTIONS:
+        header.extend((f"peak_{section}", f"time_{section}"))
+    rows = [header]
+    for result in results:
+        row = [result.name]
+        for section in SECTIONS:
+            time = result.peak_times[section]
+            row.append(f"{result.peaks[section]:.1f}")
+            row.append(datetime.strftime(time, TIME_DATE_FORMAT) if time is not None else "")
+        rows.append(row)
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+    with open(file_path, "w", encoding="utf-8") as file:
+        for row in rows:
+            file.write(";".join(row) + "\n")
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Пакетный расчет сценариев ремонта")
+    parser.add_argument("scenarios", help="JSON-файл сценариев")
+    parser.add_argument("--resolution", choices=[*TIMELINE_RESOLUTIONS, "day"], default="hour",
+                        help="шаг поиска пика энерговыделения (по умолчанию - час)")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию - число ядер)")
+    args = parser.parse_args()
+
+    config = ReportConfig.from_input_dir(input_dir)
+    scenarios = read_scenarios(args.scenarios, config.dates)
+    tvs_hash, permutations = load_inputs(config)
+
+    results = run_scenarios(
+        scenarios,
+        tvs_hash,
+        permutations,
+        None if args.resolution == "day" else args.resolution,
+        args.workers
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    write_results(results, scenarios_result_file)
@@ -0,0 +1,102 @@
+"""
+В данном модуле представлен учет содержимого отсеков (АЗ и отсеков БВ), обновляемый при каждой перестановке ТВС.
+"""
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+from heat_engine import CurveSum, MergedCurve, curve_breakpoints, day_number, get_last_campaign_end
+
+if TYPE_CHECKING:
+    from classes import TVS
+
+SECTIONS = ("az", "b03", "b01", "b02")
+
+
+class SectionLedger:
+    """
+    Содержимое отсеков: состав (номера ТВС), количество ТВС и суммарная кривая энерговыделения отсека.
+    Обновляется при перемещении каждой ТВС (move), поэтому справка на дату - это обращение к отсеку,
+    а не проход по всему пулу.
+    """
+
+    def __init__(
+            self,
+            tvs_hash: dict[str, "TVS"],
+            breakpoints: Optional[dict[str, list[tuple[int, float, float]]]] = None
+    ):
+        """
+        :param tvs_hash: словарь, содержащий все ТВС (координаты ТВС меняются через move)
+        :param breakpoints: точки излома кривых ТВС из другого учета того же пула (опционально, не пересчитываются)
+        """
+        self.tvs_hash = tvs_hash
+        self.members: dict[str, set[str]] = {section: set() for section in SECTIONS}
+        self.section_of: dict[str, Optional[str]] = {}
+
+        # точки излома кривой энерговыделения каждой ТВС как функции абсолютной даты
+        if breakpoints is None:
+            breakpoints = {}
+            for tvs in tvs_hash.values():
+                end = get_last_campaign_end(tvs)
+                if end is None:
+                    print(f"Невозможно вычислить остаточное энерговыделение ТВС {tvs.number}: ")
+                    print(f"(Проблемы с доступом к полям TVS.history)")
+                    breakpoints[tvs.number] = []
+                else:
+                    breakpoints[tvs.number] = curve_breakpoints(tvs.heat_curve, end.toordinal())
+        self.breakpoints: dict[str, list[tuple[int, float, float]]] = breakpoints
+
+        days = sorted({day for points in self.breakpoints.values() for day, _, _ in points})
+        self.curves: dict[str, CurveSum] = {section: CurveSum(days) for section in SECTIONS}
+
+        for tvs in tvs_hash.values():
+            self._add(tvs.number, tvs.get_section())
+
+    def _add(self, number: str, section: Optional[str]):
+        self.section_of[number] = section
+        if section is not None:
+            self.members[section].add(number)
+            self.curves[section].add(self.breakpoints[number])
+
+    def _remove(self, number: str):
+        section = self.section_of.pop(number)
+        if section is not None:
+            self.members[section].discard(number)
+            if self.members[section]:
+                self.curves[section].add(self.breakpoints[number], -1)
+            else:
+                # вычитание всех кривых оставляет в сумме погрешность округления (в т.ч. отрицательную)
+                self.curves[section].clear()
+
+    def move(self, number: str, new_most: int, new_tel: int):
+        """
+        Перемещает ТВС в новые координаты (мутирует ТВС в `tvs_hash`) и обновляет учет отсеков
+        """
+        tvs = self.tvs_hash[number]
+        tvs.most = new_most
+        tvs.tel = new_tel
+        section = tvs.get_section()
+        if section != self.section_of[number]:
+            self._remove(number)
+            self._add(number, section)
+
+    def count(self, section: str) -> int:
+        """
+        Количество ТВС в отсеке
+        """
+        return len(self.members[section])
+
+    def heat(self, section: str, date: datetime) -> float:
+        """
+        Суммарное остаточное энерговыделение ТВС отсека на дату (время внутри суток учитывается линейной интерполяцией);
+        у пустого отсека - ровно 0.0
+        """
+        if not self.members[section]:
+            return 0.0
+        # погрешность округления суммы не дает отрицательного энерговыделения
+        return max(0.0, self.curves[section](day_number(date)))
+
+    def section_curve(self, section: str) -> MergedCurve:
+        """
+        Суммарная кривая энерговыделения текущего состава отсека как функция даты (снимок, не меняется при move)
+        """
+        return MergedCurve(point for number in self.members[section] for point in self.breakpoints[number])
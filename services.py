@@ -1,15 +1,16 @@
+import importlib.util
 import os
 from copy import copy
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from math import ceil, floor
-from typing import TYPE_CHECKING, Literal, Iterator
+from datetime import datetime
+from math import ceil
+from types import ModuleType
+from typing import Literal, Iterator, Optional
 
-from constants import DATE_FORMAT, TIME_DATE_FORMAT, reactor_places_gen
-from input import controller
-
-if TYPE_CHECKING:
-    from classes import TVS
+from cache import file_digest, load_cache, save_cache
+from constants import AZ_COORDINATES, DATE_FORMAT, REACTOR_PLACES, TIME_DATE_FORMAT
+from error import CustomFileNotFound, MPFileError
+from real48_codec import decode_real48
 
 
 @dataclass
@@ -64,6 +65,8 @@ def clear_folder_files(folder_path):
 def parse_real48(real48):
     """
     Преобразует массив из 6 байт (формат Real48 Delphi) в число типа float (double).
+    Расшифровка выполняется целочисленно (см. real48_codec), результат побитово совпадает с поразрядной сборкой
+    мантиссы.
 
     Args:
         real48: list или bytes длиной 6 — байты числа в формате Real48 (little‑endian).
@@ -71,149 +74,277 @@ def parse_real48(real48):
     Returns:
         float — значение в формате double.
     """
-    if len(real48) != 6:
-        raise ValueError("Массив real48 должен содержать ровно 6 байт")
-
-    # Если первый байт равен 0, число считается нулевым
-    if real48[0] == 0:
-        return 0.0
-
-    # Экспонента: первый байт минус bias (129)
-    exponent = real48[0] - 129.0
+    return decode_real48(real48)
 
-    # Сборка мантиссы
-    mantissa = 0.0
-    # Обрабатываем байты 1–4 (индексы 1–4 в массиве)
-    for i in range(1, 5):
-        mantissa += real48[i]
-        mantissa *= 0.00390625  # Эквивалентно делению на 256
 
-    # Добавляем младший байт (5‑й элемент, индекс 5), маскируя старший бит (знак)
-    mantissa += (real48[5] & 0x7F)
-    mantissa *= 0.0078125  # Эквивалентно делению на 128
+# поля дат управляющего файла и их форматы
+DATE_FIELDS = {
+    "begin_date": DATE_FORMAT,
+    "end_date": DATE_FORMAT,
+    "stage_3_begin": TIME_DATE_FORMAT,
+    "stage_3_end": TIME_DATE_FORMAT,
+    "stage_5_begin": TIME_DATE_FORMAT,
+    "stage_5_end": TIME_DATE_FORMAT,
+    "otvs_begin": TIME_DATE_FORMAT,
+    "otvs_end": TIME_DATE_FORMAT,
+}
 
-    # Неявная единица перед двоичной точкой
-    mantissa += 1.0
 
-    # Проверяем старший бит последнего байта — это бит знака
-    if (real48[5] & 0x80) == 0x80:
-        mantissa = -mantissa
-
-    # Итоговый результат: мантисса * 2^экспонента
-    return mantissa * (2.0 ** exponent)
+def load_controller(input_dir: Optional[str] = None) -> ModuleType:
+    """
+    Загружает управляющий файл `controller.py`. Выполняется только по запросу (не при импорте модулей),
+    поэтому модули скрипта можно импортировать без `input/controller.py`.
+    :param input_dir: директория с `controller.py` (по умолчанию - `input` в текущей директории)
+    :return: модуль controller
+    """
+    input_dir = os.path.join(os.getcwd(), "input") if input_dir is None else input_dir
+    file_path = os.path.join(input_dir, "controller.py")
+    if not os.path.isfile(file_path):
+        raise CustomFileNotFound(file_path)
+    spec = importlib.util.spec_from_file_location("controller", file_path)
+    controller = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(controller)
+    return controller
 
 
-def get_dates() -> Dates:
+def get_dates(controller: Optional[ModuleType] = None) -> Dates:
     """
     Обрабатывает получение дат из файла `input/controller.py`
+    :param controller: загруженный управляющий файл (по умолчанию загружается `input/controller.py`)
     :return: словарь дат из controller.py
     """
+    controller = load_controller() if controller is None else controller
+    fields = {name: getattr(controller, name) for name in DATE_FIELDS}
+    return parse_dates(controller.block_number, fields)
+
+
+def parse_dates(block_number: int, fields: dict[str, str], source: str = "`input/controller.py`") -> Dates:
+    """
+    Разбирает даты справки и этапов из строк (формат - как в `input/controller.py`)
+    :param block_number: номер блока
+    :param fields: словарь {поле: строка даты} для всех полей DATE_FIELDS
+    :param source: откуда взяты даты (для сообщения об ошибке)
+    :return: Dates
+    """
     try:
-        begin_date = datetime.strptime(controller.begin_date, DATE_FORMAT)
-        end_date = datetime.strptime(controller.end_date, DATE_FORMAT)
-        stage_3_begin = datetime.strptime(controller.stage_3_begin, TIME_DATE_FORMAT)
-        stage_3_end = datetime.strptime(controller.stage_3_end, TIME_DATE_FORMAT)
-        stage_5_begin = datetime.strptime(controller.stage_5_begin, TIME_DATE_FORMAT)
-        stage_5_end = datetime.strptime(controller.stage_5_end, TIME_DATE_FORMAT)
-        otvs_begin = datetime.strptime(controller.otvs_begin, TIME_DATE_FORMAT)
-        otvs_end = datetime.strptime(controller.otvs_end, TIME_DATE_FORMAT)
+        parsed = {name: datetime.strptime(fields[name], date_format) for name, date_format in DATE_FIELDS.items()}
     except ValueError as err:
-        print("Ошибка парсинга дат, проверьте данные в файле `input/controller.py`")
+        print(f"Ошибка парсинга дат, проверьте данные в {source}")
         raise err
 
+    dates = Dates(block_number, **parsed)
+
     # полную проверку делать очень долго => минимальную валидацию разместил здесь
-    assert begin_date < end_date
-    assert stage_3_begin < stage_3_end
-    assert stage_5_begin < stage_5_end
-    assert otvs_begin < otvs_end
-
-    dates = Dates(
-        controller.block_number,
-        begin_date,
-        end_date,
-        stage_3_begin,
-        stage_3_end,
-        stage_5_begin,
-        stage_5_end,
-        otvs_begin,
-        otvs_end,
-    )
+    assert dates.begin_date < dates.end_date
+    assert dates.stage_3_begin < dates.stage_3_end
+    assert dates.stage_5_begin < dates.stage_5_end
+    assert dates.otvs_begin < dates.otvs_end
+
     return dates
 
 
-def get_content(tvs_hash: dict[str, "TVS"]) -> (dict[str, "TVS"], dict[str, "TVS"], dict[str, "TVS"], dict[str, "TVS"]):
+def get_timeline_resolution(controller: Optional[ModuleType] = None) -> Optional[str]:
     """
-    Сортирует содержимое общего словаря с ТВС на списки содержимого АЗ и отсеков БВ
-    :param tvs_hash: словарь, содержащий все ТВС
-    :return:
+    Получает шаг временной шкалы справки из файла `input/controller.py` (необязательное поле `timeline_resolution`)
+    :param controller: загруженный управляющий файл (по умолчанию загружается `input/controller.py`)
+    :return: "hour", "shift", "permutation" или None, если временная шкала не нужна
     """
-    az = {}
-    b_03 = {}
-    b_01 = {}
-    b_02 = {}
-    for tvs in tvs_hash.values():
-        match tvs.get_section():
-            case "az":
-                az[tvs.number] = tvs
-            case "b03":
-                b_03[tvs.number] = tvs
-            case "b01":
-                b_01[tvs.number] = tvs
-            case "b02":
-                b_02[tvs.number] = tvs
-
-    return az, b_03, b_01, b_02
-
-
-def calculate_section(content: dict[str, "TVS"], date: datetime) -> (int, float):
-    """
-    Подсчитывает количество ТВС в отсеке и общее тепловыделение отсека
-    :param content:
-    :param date:
-    :return:
+    controller = load_controller() if controller is None else controller
+    resolution = getattr(controller, "timeline_resolution", None)
+    if resolution is not None and resolution not in ("hour", "shift", "permutation"):
+        print("Неизвестный шаг временной шкалы, проверьте поле `timeline_resolution` в файле `input/controller.py`")
+        raise ValueError(resolution)
+    return resolution
+
+
+def get_stage_windows(controller: Optional[ModuleType] = None) -> dict[str, tuple[datetime, datetime]]:
+    """
+    Получает допустимые окна начала этапов из файла `input/controller.py` (необязательные поля
+    `stage_3_window`, `stage_5_window`, `otvs_window` - пары строк "самое раннее начало", "самое позднее начало")
+    :param controller: загруженный управляющий файл (по умолчанию загружается `input/controller.py`)
+    :return: dict[этап, (самое раннее начало, самое позднее начало)] только для заданных окон
+    """
+    controller = load_controller() if controller is None else controller
+    windows = {}
+    for stage in ("stage_3", "stage_5", "otvs"):
+        window = getattr(controller, f"{stage}_window", None)
+        if window is None:
+            continue
+        try:
+            earliest, latest = (datetime.strptime(moment, TIME_DATE_FORMAT) for moment in window)
+        except ValueError as err:
+            print(f"Ошибка парсинга дат, проверьте поле `{stage}_window` в файле `input/controller.py`")
+            raise err
+        assert earliest <= latest
+        windows[stage] = (earliest, latest)
+    return windows
+
+
+def iter_mp_records(
+        file_path: str,
+        errors: Optional[list[tuple[int, str, str]]] = None
+) -> Iterator[tuple[str, int, int, int, int]]:
+    """
+    Построчно (без чтения всего файла) разбирает файл МП.
+    Некорректные строки не прерывают разбор: собираются все с номерами строк. Если передан список `errors`,
+    они добавляются в него, иначе по окончании разбора выбрасывается MPFileError со всеми некорректными строками.
+    Перестановки имитаторов (ITVS) пропускаются.
+    :param file_path: файл МП
+    :param errors: список для некорректных строк (номер строки, строка, причина) - режим проверки файла
+    :return: итератор (номер ТВС, старый мост, старая тележка, новый мост, новая тележка)
     """
-    count = len(content)
-    heat = 0.0
-    for tvs in content.values():
-        heat += tvs.calculate_heat(date)
-    return count, heat
+    collected = [] if errors is None else errors
+    with open(file_path) as file:
+        for line_number, line in enumerate(file, 1):
+            split_line = line.split()
+            if len(split_line) < 8:
+                collected.append((line_number, line.rstrip("\n"), "недостаточно полей (ошибка индексации строки)"))
+                continue
+            tvs_number = split_line[3]
+            try:
+                old_most, old_tel, new_most, new_tel = map(int, split_line[4:8])
+            except ValueError:
+                collected.append((line_number, line.rstrip("\n"), "координаты не являются целыми числами"))
+                continue
+
+            # не учитываем перестановки имитаторов нигде
+            if "ITVS" not in tvs_number:
+                yield tvs_number, old_most, old_tel, new_most, new_tel
+
+    if errors is None and collected:
+        raise MPFileError(file_path, collected)
+
+
+def iter_mp_file(
+        file_path: str,
+        mode: Literal["forward", "backup"] = "forward",
+        errors: Optional[list[tuple[int, str, str]]] = None
+) -> Iterator[Permutation]:
+    """
+    Лениво выдает перестановки файла МП
+    :param file_path: файл МП
+    :param mode: "forward" - перестановки в новые координаты, "backup" - обратные (в старые координаты)
+    :param errors: см. iter_mp_records
+    :return: итератор перестановок
+    """
+    if mode == "backup":
+        for tvs_number, old_most, old_tel, _, _ in iter_mp_records(file_path, errors):
+            yield Permutation(tvs_number, old_most, old_tel)
+    else:
+        for tvs_number, _, _, new_most, new_tel in iter_mp_records(file_path, errors):
+            yield Permutation(tvs_number, new_most, new_tel)
+
+
+def validate_mp_file(file_path: str) -> list[tuple[int, str, str]]:
+    """
+    Проверяет файл МП за один проход
+    :return: все некорректные строки: list[(номер строки, строка, причина)]
+    """
+    errors = []
+    for _ in iter_mp_records(file_path, errors):
+        pass
+    return errors
 
 
 def parse_mp_file(file_path: str, *args) -> list[Permutation]:
     """
     Парсит файл МП в список последовательных перестановок
     :param file_path:
+    :param args: "backup" - вернуть также обратные перестановки: (обратные, прямые)
     :return:
     """
     backup_permutations = []
     permutations = []
-    with open(file_path) as file:
-        lines = file.readlines()
-        for line in lines:
-            split_line = line.split()
-            try:
-                tvs_number = split_line[3]
-                try:
-                    old_most = int(split_line[4])
-                    old_tel = int(split_line[5])
-                    new_most = int(split_line[6])
-                    new_tel = int(split_line[7])
-                except ValueError as err:
-                    print(f"Ошибка парсинга файла МП: `{file_path}`.\n(Ошибка приведения типов int()).")
-                    raise err
-            except IndexError as err:
-                print(f"Ошибка парсинга файла МП: `{file_path}`.\n(Ошибка индексации строки файла.)")
-                raise err
+    try:
+        for tvs_number, old_most, old_tel, new_most, new_tel in iter_mp_records(file_path):
+            permutations.append(Permutation(tvs_number, new_most, new_tel))
+            backup_permutations.append(Permutation(tvs_number, old_most, old_tel))
+    except MPFileError as err:
+        print(f"Ошибка парсинга файла МП: `{file_path}`.\n(Некорректных строк: {len(err.errors)}.)")
+        raise err
+
+    if "backup" in args:
+        return backup_permutations, permutations
+
+    return permutations
+
+
+def input_digest(file_path: str) -> Optional[str]:
+    """
+    Хэш содержимого входного файла для ключа кэша (None - файла нет)
+    """
+    try:
+        return file_digest(file_path)
+    except FileNotFoundError:
+        return None
+
+
+def pack_permutations(permutations: list[Permutation]) -> tuple[tuple[str, int, int], ...]:
+    """
+    Компактное представление перестановок для кэша: кортежи (номер ТВС, мост, тележка)
+    """
+    return tuple((item.tvs_number, item.new_most, item.new_tel) for item in permutations)
 
-            # не учитываем перестановки имитаторов нигде
-            if "ITVS" not in tvs_number:
-                permutations.append(Permutation(tvs_number, new_most, new_tel))
-                backup_permutations.append(Permutation(tvs_number, old_most, old_tel))
 
-        if "backup" in args:
-            return backup_permutations, permutations
+def unpack_permutations(packed: tuple[tuple[str, int, int], ...]) -> list[Permutation]:
+    return [Permutation(tvs_number, new_most, new_tel) for tvs_number, new_most, new_tel in packed]
 
-        return permutations
+
+def load_permutations(
+        stage_3_file: str,
+        stage_5_file: str,
+        otvs_file: str,
+        permutations_file: str,
+        cache_path: Optional[str] = None
+) -> (list[Permutation], list[Permutation], list[Permutation]):
+    """
+    Читает перестановки этапов из файлов МП, используя дисковый кэш.
+    Если файла МП этапа 5 нет, загрузка в АЗ строится обратными перестановками этапа 3
+    (кроме перестановок, выполненных в БВ безвозвратно - см. `permutations_file`).
+    Кэш привязан к хэшам всех четырех файлов (в т.ч. к отсутствию файла этапа 5 или `permutations_file`):
+    при изменении любого из них файлы МП разбираются заново.
+    :param cache_path: расположение файла кэша (по умолчанию - `permutations.cache` рядом с файлом МП этапа 3)
+    :return: перестановки этапа 3, этапа 5 и вывоза ОТВС
+    """
+    if cache_path is None:
+        cache_path = os.path.join(os.path.dirname(stage_3_file), "permutations.cache")
+
+    key = tuple(input_digest(file_path) for file_path in (stage_3_file, stage_5_file, otvs_file, permutations_file))
+    cached = load_cache(cache_path, key)
+    if cached is not None:
+        print("Перестановки файлов МП загружены из кэша.")
+        return tuple(unpack_permutations(packed) for packed in cached)
+
+    permutations = parse_permutations(stage_3_file, stage_5_file, otvs_file, permutations_file)
+    save_cache(cache_path, key, tuple(pack_permutations(stage) for stage in permutations))
+    return permutations
+
+
+def parse_permutations(
+        stage_3_file: str,
+        stage_5_file: str,
+        otvs_file: str,
+        permutations_file: str
+) -> (list[Permutation], list[Permutation], list[Permutation]):
+    """
+    Разбирает файлы МП этапов (без кэша, см. load_permutations)
+    :return: перестановки этапа 3, этапа 5 и вывоза ОТВС
+    """
+    try:
+        irrevocable_permutations = get_irrevocable_permutations(permutations_file)
+    except FileNotFoundError:
+        irrevocable_permutations = set()
+
+    backup_permutations, stage_3_permutations = parse_mp_file(stage_3_file, "backup")
+    backup_permutations = filter_backup(backup_permutations, irrevocable_permutations)
+
+    try:
+        stage_5_permutations = parse_mp_file(stage_5_file)
+    except FileNotFoundError:
+        stage_5_permutations = backup_permutations
+
+    otvs_permutations = parse_mp_file(otvs_file)
+    return stage_3_permutations, stage_5_permutations, otvs_permutations
 
 
 def get_permutation_time(permutations_count: int, begin: datetime, end: datetime) -> float:
@@ -233,96 +364,6 @@ def get_permutation_time(permutations_count: int, begin: datetime, end: datetime
     return permutation_time
 
 
-def make_permutations(
-        period_begin_time: datetime,
-        period_end_time: datetime,
-        time_by_permutation: float,
-        iterator: Iterator[Permutation],
-        tvs_hash: dict[str, "TVS"],
-        mode: Literal["floor", "ceil"] = "ceil"
-):
-    """
-    Выполняет перестановки, укладывающиеся в отведенный промежуток времени
-    :param period_begin_time: конец временного периода
-    :param period_end_time: начало временного периода (дня)
-    :param time_by_permutation: время, затрачиваемое на одну перестановку
-    :param iterator: итератор перестановок
-    :param tvs_hash: словарь, содержащий информащию о всех ТВС (мутирует)
-    :param mode: режим округления
-    :return: None, но мутирует `tvs_hash`
-    """
-    # вычисляем время, доступное для перестановок (в секундах)
-    time_reserve = (period_end_time - period_begin_time).total_seconds()
-    # вычисляем доступное число перестановок
-    match mode:
-        case "floor":
-            perm_number = floor(time_reserve / time_by_permutation)
-        case _:
-            perm_number = ceil(time_reserve / time_by_permutation)
-
-    # делаем перестановки
-    i = 1
-    while i <= perm_number:
-        try:
-            permutation = next(iterator)
-        except StopIteration:
-            i += 1
-            continue
-        tvs = tvs_hash[permutation.tvs_number]
-        tvs.most = permutation.new_most
-        tvs.tel = permutation.new_tel
-        i += 1
-
-
-def permutation_processor(
-        period_begin: datetime,
-        period_end: datetime,
-        today: datetime,
-        time_by_permutation: float,
-        iterator: Iterator[Permutation],
-        tvs_hash: dict[str, "TVS"],
-):
-    """
-    Производит перестановки в период времени от `period_begin` до `period_end`
-    :param period_begin: начало обрабатываемого периода
-    :param period_end: конец обрабатываемо периода
-    :param today: день (главный итератор)
-    :param time_by_permutation: время на перестановку
-    :param iterator: итератор по списку перестановок
-    :param tvs_hash: словарь, содержащий информащию о всех ТВС (мутирует)
-    :return: None, но мутирует `tvs_hash`
-    """
-    if period_begin.date() == today.date():
-        tomorrow = today + timedelta(days=1)
-        make_permutations(
-            period_begin_time=period_begin,
-            period_end_time=tomorrow,
-            time_by_permutation=time_by_permutation,
-            iterator=iterator,
-            tvs_hash=tvs_hash,
-            mode="floor"
-        )
-    elif period_begin.date() < today.date() < period_end.date():
-        tomorrow = today + timedelta(days=1)
-        make_permutations(
-            period_begin_time=today,
-            period_end_time=tomorrow,
-            time_by_permutation=time_by_permutation,
-            iterator=iterator,
-            tvs_hash=tvs_hash,
-            mode="ceil"
-        )
-    elif today.date() == period_end.date():
-        make_permutations(
-            period_begin_time=today,
-            period_end_time=period_end,
-            time_by_permutation=time_by_permutation,
-            iterator=iterator,
-            tvs_hash=tvs_hash,
-            mode="ceil"
-        )
-
-
 def generate_comment(
         last_day: Day,
         count_az: int,
@@ -353,7 +394,7 @@ def generate_comment(
     return "".join(elm for elm in comment)
 
 
-def get_places(places_gen: dict):
+def get_places(places_gen: dict = REACTOR_PLACES):
     """Формировщик списка мест ЗБМ"""
     places_lst: list[str] = []
     for item, val in places_gen.items():
@@ -362,43 +403,29 @@ def get_places(places_gen: dict):
     return places_lst
 
 
-def get_irrevocable_permutations(permutations_file: str):
+def get_irrevocable_permutations(permutations_file: str) -> set[tuple[int, int]]:
     """
     Получает множество перестановок, выполненных в БВ безвозвратно
+    :return: координаты ячеек АЗ (мост, тележка)
     """
-    az_coordinates = get_places(reactor_places_gen)
     irrevocable_permutations = set()
     with open(permutations_file, "r") as file:
         lines = file.readlines()
         for line in lines:
             cell_number = int(line.strip())
-            irrevocable_permutations.add(az_coordinates[cell_number - 1])
+            irrevocable_permutations.add(AZ_COORDINATES[cell_number - 1])
     return irrevocable_permutations
 
 
-def filter_backup(backup_permutations: list[Permutation], irrevocable_permutations: set[str]) -> list[Permutation]:
+def filter_backup(
+        backup_permutations: list[Permutation],
+        irrevocable_permutations: set[tuple[int, int]]
+) -> list[Permutation]:
     """
     Фильтрует обратные перестановки из БВ в АЗ
     """
     result_permutations = []
-
-    both_places = []
-    perm_set = set()
-    coord_set = set()
-    duplications = []
-
-    for permutation in backup_permutations:
-        coord = f"{permutation.new_most}-{permutation.new_tel}"
-        if coord in coord_set:
-            duplications.append(permutation)
-        coord_set.add(coord)
-
-
     for permutation in backup_permutations:
-        coord = f"{permutation.new_most}-{permutation.new_tel}"
-        coord_set.add(coord)
-        if coord in irrevocable_permutations:
-            both_places.append(permutation)
-        if coord not in irrevocable_permutations:
+        if (permutation.new_most, permutation.new_tel) not in irrevocable_permutations:
             result_permutations.append(copy(permutation))
     return result_permutations
@@ -0,0 +1,371 @@
+"""
+В данном модуле представлено событийное моделирование перестановок: время каждой перестановки вычисляется заранее,
+потоки перестановок (этап 3, этап 5, вывоз ОТВС) сливаются в один упорядоченный по времени поток событий,
+а состояние отсеков меняется только в моменты событий.
+"""
+import csv
+import hashlib
+import heapq
+from collections import ChainMap
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Literal, Optional
+
+from constants import TIME_DATE_FORMAT
+from error import CheckpointMismatchError
+from section_ledger import SECTIONS, SectionLedger
+from services import Dates, Day, Permutation, generate_comment, get_permutation_time
+
+if TYPE_CHECKING:
+    from classes import TVS
+
+# шаг временной шкалы справки внутри суток; "permutation" - снимок после каждой перестановки
+TIMELINE_STEPS = {
+    "hour": timedelta(hours=1),
+    "shift": timedelta(hours=8),
+}
+TIMELINE_RESOLUTIONS = (*TIMELINE_STEPS, "permutation")
+
+
+@dataclass(order=True)
+class Event:
+    """
+    Перестановка, привязанная ко времени ее завершения.
+    При совпадении времени порядок определяется номером потока, затем порядковым номером перестановки в потоке.
+    """
+    time: datetime
+    stream: int
+    index: int
+    stage: str = field(compare=False)
+    permutation: Permutation = field(compare=False)
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """
+    Контрольная точка моделирования: состояние после всех событий, завершившихся раньше момента `time`.
+    Координаты ТВС хранятся копированием при записи: каждая контрольная точка добавляет к цепочке родительской точки
+    только координаты ТВС, перемещенных с момента предыдущей точки.
+    """
+    time: datetime
+    # координаты ТВС: dict[номер ТВС, (мост, тележка)] (слои изменений поверх исходного состояния)
+    positions: ChainMap
+    # число примененных событий каждого потока: dict[номер потока, число событий]
+    cursors: dict[int, int]
+    # контрольная сумма примененных событий (см. event_key) - для проверки событий при продолжении
+    digest: str
+    # строки суточной справки до контрольной точки
+    days: tuple[Day, ...]
+
+
+@dataclass
+class Snapshot:
+    """
+    Состояние отсеков на момент справки: количество ТВС и остаточное энерговыделение по отсекам
+    """
+    time: datetime
+    counts: dict[str, int]
+    heats: dict[str, float]
+
+
+def event_key(event: Event) -> bytes:
+    """
+    Событие для контрольной суммы: время, поток, номер в потоке и перестановка
+    """
+    permutation = event.permutation
+    return (f"{event.time.isoformat()};{event.stream};{event.index};"
+            f"{permutation.tvs_number};{permutation.new_most};{permutation.new_tel}\n").encode()
+
+
+def permutation_events(
+        stage: str,
+        permutations: list[Permutation],
+        begin: datetime,
+        end: datetime,
+        stream: int = 0
+) -> Iterator[Event]:
+    """
+    Поток событий этапа: k-я перестановка (с нуля) завершается в момент begin + (k + 1) * t,
+    где t - время на перестановку (см. get_permutation_time); моменты позже конца этапа приводятся к концу этапа.
+    :param stage: название этапа (для журнала событий)
+    :param permutations: перестановки этапа в порядке выполнения
+    :param begin: начало этапа
+    :param end: конец этапа
+    :param stream: номер потока (порядок потоков при совпадении времени событий)
+    :return: события в порядке возрастания времени
+    """
+    if not permutations:
+        return
+    time_by_permutation = get_permutation_time(len(permutations), begin, end)
+    for k, permutation in enumerate(permutations):
+        time = min(begin + timedelta(seconds=(k + 1) * time_by_permutation), end)
+        yield Event(time, stream, k, stage, permutation)
+
+
+def merge_events(*streams: Iterable[Event]) -> Iterator[Event]:
+    """
+    Сливает упорядоченные потоки событий в один упорядоченный по времени поток (через кучу)
+    """
+    return heapq.merge(*streams)
+
+
+def outage_events(
+        dates: Dates,
+        stage_3_permutations: list[Permutation],
+        stage_5_permutations: list[Permutation],
+        otvs_permutations: list[Permutation]
+) -> Iterator[Event]:
+    """
+    Поток событий ремонта: этапы 3, 5 и вывоз ОТВС, слитые по времени
+    """
+    return merge_events(
+        # выгрузка ТВС из АЗ в БВ
+        permutation_events("stage_3", stage_3_permutations, dates.stage_3_begin, dates.stage_3_end, 0),
+        # загрузка ТВС из БВ в АЗ
+        permutation_events("stage_5", stage_5_permutations, dates.stage_5_begin, dates.stage_5_end, 1),
+        # выгрузка ОТВС
+        permutation_events("otvs", otvs_permutations, dates.otvs_begin, dates.otvs_end, 2),
+    )
+
+
+def get_report_dates(dates: Dates) -> list[datetime]:
+    """
+    Даты справки: с начальной по конечную включительно
+    """
+    report_dates = [dates.begin_date]
+    while report_dates[-1] < dates.end_date:
+        report_dates.append(report_dates[-1] + timedelta(days=1))
+    return report_dates
+
+
+class Simulator:
+    """
+    Продвигает состояние ТВС по потоку событий: каждая перестановка применяется к учету отсеков в момент события
+    и попадает в журнал `log`.
+    """
+
+    def __init__(self, ledger: SectionLedger, events: Iterable[Event], checkpoint: Optional[Checkpoint] = None):
+        """
+        :param ledger: учет содержимого отсеков (мутирует)
+        :param events: упорядоченный по времени поток событий
+        :param checkpoint: контрольная точка, с которой продолжается моделирование (см. resume): события,
+        завершившиеся до нее, пропускаются и сверяются с событиями, на которых получена точка
+        (CheckpointMismatchError при расхождении)
+        """
+        self.ledger = ledger
+        self.log: list[Event] = []
+        self.checkpoints: dict[datetime, Checkpoint] = {}
+        self.cursors: dict[int, int] = {}
+        # контрольная сумма примененных (или пропущенных при продолжении) событий
+        self._digest = hashlib.sha256()
+        # координаты ТВС, перемещенных после последней контрольной точки
+        self._changes: dict[str, tuple[int, int]] = {}
+        self.events = iter(events)
+        if checkpoint is None:
+            self.days: list[Day] = []
+            self._positions = ChainMap({number: (tvs.most, tvs.tel) for number, tvs in ledger.tvs_hash.items()})
+            self._pending: Optional[Event] = next(self.events, None)
+        else:
+            self.days = list(checkpoint.days)
+            self._positions = checkpoint.positions
+            self._pending = self._skip_consumed(checkpoint)
+
+    def _consume(self, event: Event):
+        self.cursors[event.stream] = self.cursors.get(event.stream, 0) + 1
+        self._digest.update(event_key(event))
+
+    def _skip_consumed(self, checkpoint: Checkpoint) -> Optional[Event]:
+        """
+        Пропускает события, завершившиеся раньше момента контрольной точки (они уже учтены в точке),
+        и проверяет, что это те же события, на которых получена точка: их число в каждом потоке
+        и контрольная сумма должны совпадать с сохраненными в точке
+        :return: первое событие после контрольной точки
+        """
+        event = next(self.events, None)
+        while event is not None and event.time < checkpoint.time:
+            self._consume(event)
+            event = next(self.events, None)
+        if self.cursors != checkpoint.cursors:
+            raise CheckpointMismatchError(
+                checkpoint.time,
+                f"число событий до точки по потокам: {self.cursors}, в контрольной точке: {checkpoint.cursors}"
+            )
+        if self._digest.hexdigest() != checkpoint.digest:
+            raise CheckpointMismatchError(checkpoint.time, "перестановки до точки не совпадают с перестановками точки")
+        return event
+
+    @classmethod
+    def resume(
+            cls,
+            checkpoint: Checkpoint,
+            tvs_hash: dict[str, "TVS"],
+            events: Iterable[Event],
+            breakpoints: Optional[dict[str, list[tuple[int, float, float]]]] = None
+    ) -> "Simulator":
+        """
+        Продолжение моделирования с контрольной точки: координаты ТВС восстанавливаются из точки,
+        общая часть моделирования до точки не повторяется.
+        Из одной точки можно продолжать несколько вариантов (например, с другим `otvs.mp` или `otvs_begin`)
+        поочередно: ТВС в `tvs_hash` общие, каждое продолжение заново выставляет их координаты.
+        :param checkpoint: контрольная точка
+        :param tvs_hash: словарь, содержащий все ТВС (координаты мутируют)
+        :param events: поток событий варианта (те же номера потоков, что и до точки); события до точки должны
+        совпадать с событиями, на которых получена точка, иначе - CheckpointMismatchError
+        :param breakpoints: точки излома кривых ТВС (см. SectionLedger), чтобы не пересчитывать их
+        """
+        for number, (most, tel) in checkpoint.positions.items():
+            tvs = tvs_hash[number]
+            tvs.most = most
+            tvs.tel = tel
+        return cls(SectionLedger(tvs_hash, breakpoints), events, checkpoint)
+
+    def advance(self, until: datetime, on_event: Optional[Callable[[Event], None]] = None) -> list[Event]:
+        """
+        Применяет все события, завершившиеся строго раньше момента `until`
+        :param until: момент, до которого продвигается состояние
+        :param on_event: вызывается после применения каждого события (опционально)
+        :return: примененные события
+        """
+        applied = []
+        while self._pending is not None and self._pending.time < until:
+            event = self._pending
+            permutation = event.permutation
+            self.ledger.move(permutation.tvs_number, permutation.new_most, permutation.new_tel)
+            self._changes[permutation.tvs_number] = (permutation.new_most, permutation.new_tel)
+            self._consume(event)
+            applied.append(event)
+            if on_event is not None:
+                on_event(event)
+            self._pending = next(self.events, None)
+        self.log.extend(applied)
+        return applied
+
+    def checkpoint(self, time: datetime) -> Checkpoint:
+        """
+        Контрольная точка: продвигает состояние до момента `time` и фиксирует его
+        (копируются только координаты ТВС, перемещенных после предыдущей точки)
+        """
+        self.advance(time)
+        if self.log and self.log[-1].time >= time:
+            raise CheckpointMismatchError(time, f"уже применено событие, завершившееся {self.log[-1].time}")
+        self._positions = self._positions.new_child(self._changes)
+        self._changes = {}
+        return Checkpoint(time, self._positions, dict(self.cursors), self._digest.hexdigest(), tuple(self.days))
+
+    def snapshot(self, time: datetime) -> Snapshot:
+        """
+        Снимок текущего состава отсеков, энерговыделение - на момент `time`
+        """
+        counts = {section: self.ledger.count(section) for section in SECTIONS}
+        heats = {section: self.ledger.heat(section, time) for section in SECTIONS}
+        return Snapshot(time, counts, heats)
+
+    def report(self, moments: Iterable[datetime]) -> list[Snapshot]:
+        """
+        Справка с произвольным шагом: состояние после всех событий, завершившихся раньше каждого момента
+        """
+        snapshots = []
+        for moment in moments:
+            self.advance(moment)
+            snapshots.append(self.snapshot(moment))
+        return snapshots
+
+    def daily_report(self, report_dates: Iterable[datetime]) -> list[Day]:
+        """
+        Суточная справка: состав отсеков на конец суток, энерговыделение - на начало суток (дату справки)
+        """
+        days, _ = self.run(report_dates)
+        return days
+
+    def run(
+            self,
+            report_dates: Iterable[datetime],
+            resolution: Optional[Literal["hour", "shift", "permutation"]] = None,
+            checkpoint_dates: Iterable[datetime] = ()
+    ) -> tuple[list[Day], list[Snapshot]]:
+        """
+        Один проход по потоку событий: суточная справка и (опционально) временная шкала с шагом внутри суток
+        :param report_dates: даты справки (по возрастанию); при продолжении с контрольной точки - даты после нее
+        :param resolution: шаг временной шкалы (см. TIMELINE_RESOLUTIONS); None - без временной шкалы
+        :param checkpoint_dates: даты справки, после которых сохраняются контрольные точки (в `checkpoints`)
+        :return: (суточная справка, в т.ч. строки до контрольной точки, с которой продолжено моделирование;
+        временная шкала)
+        """
+        report_dates = list(report_dates)
+        checkpoint_dates = set(checkpoint_dates)
+        timeline: list[Snapshot] = []
+
+        on_event = None
+        moments: Iterable[datetime] = ()
+        if resolution == "permutation":
+            def on_event(event: Event):
+                timeline.append(self.snapshot(event.time))
+        elif resolution is not None:
+            moments = timeline_moments(report_dates[0], report_dates[-1] + timedelta(days=1), resolution)
+
+        # отметки: (момент, 0 - снимок временной шкалы / 1 - конец суток справки, дата справки)
+        marks = heapq.merge(
+            ((moment, 0, moment) for moment in moments),
+            ((today + timedelta(days=1), 1, today) for today in report_dates),
+        )
+
+        days = self.days
+        for until, kind, today in marks:
+            self.advance(until, on_event)
+            if kind == 0:
+                timeline.append(self.snapshot(until))
+                continue
+
+            state = self.snapshot(today)
+            counts, heats = state.counts, state.heats
+
+            try:
+                comment = generate_comment(days[-1], counts["az"], counts["b03"], counts["b01"], counts["b02"])
+            except IndexError:
+                comment = ""
+
+            days.append(Day(
+                today,
+                counts["az"],
+                heats["az"],
+                counts["b03"],
+                heats["b03"],
+                counts["b01"],
+                heats["b01"],
+                counts["b02"],
+                heats["b02"],
+                comment
+            ))
+            if today in checkpoint_dates:
+                self.checkpoints[today] = self.checkpoint(until)
+        return list(days), timeline
+
+
+def timeline_moments(begin: datetime, end: datetime, resolution: Literal["hour", "shift"]) -> Iterator[datetime]:
+    """
+    Моменты временной шкалы с шагом `resolution` от `begin` до `end` включительно
+    """
+    step = TIMELINE_STEPS[resolution]
+    moment = begin
+    while moment <= end:
+        yield moment
+        moment += step
+
+
+def write_timeline(timeline: list[Snapshot], file_path: str):
+    """
+    Записывает временную шкалу (количество ТВС и энерговыделение по отсекам) в csv-файл
+    :param timeline: снимки состояния отсеков
+    :param file_path: путь к csv-файлу
+    """
+    with open(file_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file, delimiter=";")
+        header = ["time"]
+        for section in SECTIONS:
+            header.extend((f"count_{section}", f"heat_{section}"))
+        writer.writerow(header)
+        for state in timeline:
+            row = [datetime.strftime(state.time, TIME_DATE_FORMAT)]
+            for section in SECTIONS:
+                row.extend((state.counts[section], round(state.heats[section], 3)))
+            writer.writerow(row)
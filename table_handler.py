@@ -98,15 +98,21 @@ class TableHandler:
             par.addText(P(text=text))
 
 
-def fill_table(table_data: list[list[str]], summary: dict[str, str]):
+def fill_table(
+        table_data: list[list[str]],
+        summary: dict[str, str],
+        output_dir: str = os.path.join(os.path.curdir, "output"),
+        template: str = os.path.join(os.path.curdir, "template", "table.odt")
+):
     """
     Заполняет итоговую таблицу и сохраняет её в папке `output`.
     :param table_data: данные для заполнения таблицы. список формата [список [список из значений ячеек]]
     :param summary: словарь с общей информацией: номер блока, даты начала и конца
+    :param output_dir: папка для итоговой таблицы (по умолчанию - `output` в текущей директории)
+    :param template: шаблон таблицы (по умолчанию - `template/table.odt` в текущей директории)
     :return: None
     """
-    template = os.path.join(os.path.curdir, "template", "table.odt")
-    result = os.path.join(os.path.curdir, "output", f"Энерговыделение, блок {summary["block"]}.odt")
+    result = os.path.join(output_dir, f"Энерговыделение, блок {summary["block"]}.odt")
 
     doc = ODFHandler(template)
 
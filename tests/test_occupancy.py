@@ -0,0 +1,60 @@
+"""
+Проверки сетки занятости (occupancy): ТВС вне АЗ и БВ в исходном состоянии не занимают ячеек
+и не дают ложных конфликтов; конфликты перестановок указывают этап и порядковый номер перестановки.
+"""
+from occupancy import OccupancyGrid, validate_permutations
+from services import Permutation
+
+
+class Assembly:
+    """
+    ТВС без записи ТОПАЗ: номер и координаты
+    """
+
+    def __init__(self, number: str, most: int, tel: int):
+        self.number = number
+        self.most = most
+        self.tel = tel
+
+
+def test_off_grid_and_placeholder_records_are_skipped():
+    tvs_hash = {
+        "001": Assembly("001", 60, 1),
+        # заглушка 0-0 (мост вне АЗ и БВ)
+        "002": Assembly("002", 0, 0),
+        "003": Assembly("003", 0, 0),
+        # координаты вне сетки
+        "004": Assembly("004", 1001, 3),
+        "005": Assembly("005", 60, 1),
+    }
+    grid = OccupancyGrid(tvs_hash)
+
+    assert grid.initial_conflicts == [("005", "001")]
+    assert grid.who_is_at(60, 1) == "001"
+    assert grid.who_is_at(0, 0) is None
+    for number in ("002", "003", "004"):
+        assert not grid.on_grid(number)
+        assert grid.cell_of(number) is None
+
+    grid.move("002", 60, 2)
+    assert grid.who_is_at(60, 2) == "002"
+    assert grid.section_of("002") == "b01"
+
+
+def test_permutation_conflicts_carry_stage_and_ordinal():
+    tvs_hash = {
+        "001": Assembly("001", 1, 1),
+        "002": Assembly("002", 60, 1),
+    }
+    grid = OccupancyGrid(tvs_hash)
+    stages = [
+        ("этап 3", [Permutation("001", 60, 2), Permutation("999", 60, 3)]),
+        ("этап 5", [Permutation("002", 1, 1), Permutation("001", 1, 1)]),
+    ]
+    conflicts = validate_permutations(grid, stages)
+
+    assert [(item.stage, item.ordinal, item.tvs_number) for item in conflicts] == [
+        ("этап 3", 2, "999"),
+        ("этап 5", 2, "001"),
+    ]
+    assert str(conflicts[1]) == "этап 5, перестановка 2, ТВС 001: ячейка 1-1 занята ТВС 002"
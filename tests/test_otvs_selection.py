@@ -0,0 +1,76 @@
+"""
+Проверки подбора ОТВС (otvs_selection): подбор по кэшированному порядку на дату совпадает с полным перебором
+подходящих ТВС, в т.ч. после перемещений ТВС между отсеками и при другой выдержке.
+"""
+import random
+from datetime import datetime, timedelta
+
+from classes import TVS
+from constants import EXPOSURE_DAYS
+from heat_engine import get_heat_curve
+from otvs_selection import CandidateIndex, heat_at
+
+B01_MOST = 60
+B02_MOST = 76
+DATE = datetime(2025, 12, 10)
+
+
+class Campaign:
+    def __init__(self, end: datetime):
+        self.end = end
+
+
+class Assembly:
+    """
+    ТВС без записи ТОПАЗ: номер, координаты, кривая энерговыделения и окончание последней кампании
+    """
+
+    def __init__(self, number: str, most: int, tel: int, heat_data: list[float], end: datetime):
+        self.number = number
+        self.most = most
+        self.tel = tel
+        self.heat_curve = get_heat_curve(heat_data)
+        self.last_campaign = Campaign(end)
+
+    def get_section(self):
+        return TVS.section_by_most(self.most)
+
+
+def make_index(count: int = 200) -> CandidateIndex:
+    rng = random.Random(24)
+    tvs_hash = {}
+    for i in range(count):
+        number = f"{i:03}"
+        heat_data = sorted((rng.uniform(0.01, 20.0) for _ in EXPOSURE_DAYS), reverse=True)
+        end = DATE - timedelta(days=rng.randint(1, 4000))
+        tvs_hash[number] = Assembly(number, B01_MOST + i % 2 * (B02_MOST - B01_MOST), i, heat_data, end)
+    return CandidateIndex(tvs_hash)
+
+
+def full_scan(index: CandidateIndex, section: str, number_of_tvs: int, min_cooling_days: int) -> list[str]:
+    eligible = index.eligible(section, DATE, min_cooling_days)
+    ordered = sorted((heat_at(index.tvs_hash[number], end, DATE), end, number) for end, number in eligible)
+    return [number for _, _, number in ordered[:number_of_tvs]]
+
+
+def test_select_matches_full_scan():
+    index = make_index()
+    for min_cooling_days in (0, 365, 1095, 3000):
+        for number_of_tvs in (0, 1, 12, 24, 500):
+            selected = index.select("b01", number_of_tvs, DATE, min_cooling_days)
+            assert [tvs.number for tvs in selected] == full_scan(index, "b01", number_of_tvs, min_cooling_days)
+    assert list(index.orders) == [("b01", DATE)]
+
+    # перемещения после кэширования порядка: вывоз из b01, перевод из b02 в b01
+    selected = index.select("b01", 24, DATE, 1095)
+    for tel, tvs in enumerate(selected[:12]):
+        index.move(tvs.number, 1001, tel)
+    for number in ("001", "003", "005"):
+        index.move(number, B01_MOST, 200 + int(number))
+
+    for min_cooling_days in (0, 1095):
+        selected = index.select("b01", 24, DATE, min_cooling_days)
+        assert [tvs.number for tvs in selected] == full_scan(index, "b01", 24, min_cooling_days)
+        for tvs in selected:
+            assert tvs.heat == heat_at(tvs, tvs.last_campaign.end, DATE)
+    assert len(index.order("b01", DATE)) == len(index.sections["b01"])
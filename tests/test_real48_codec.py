@@ -0,0 +1,107 @@
+"""
+Проверки кодека Real48 (real48_codec): обратимость кодирования, нулевая экспонента
+и побитовое совпадение с поразрядной расшифровкой (прежняя services.parse_real48).
+"""
+import random
+import struct
+
+import pytest
+
+from real48_codec import REAL48_SIZE, decode_real48, decode_real48_column, decode_real48_many, encode_real48
+
+SEED = 48
+MANTISSAS_PER_EXPONENT = 64
+
+
+def legacy_parse_real48(real48) -> float:
+    """
+    Поразрядная расшифровка Real48 (прежняя services.parse_real48) - эталон для сравнения
+    """
+    if len(real48) != 6:
+        raise ValueError("Массив real48 должен содержать ровно 6 байт")
+    if real48[0] == 0:
+        return 0.0
+    exponent = real48[0] - 129.0
+    mantissa = 0.0
+    for i in range(1, 5):
+        mantissa += real48[i]
+        mantissa *= 0.00390625
+    mantissa += (real48[5] & 0x7F)
+    mantissa *= 0.0078125
+    mantissa += 1.0
+    if (real48[5] & 0x80) == 0x80:
+        mantissa = -mantissa
+    return mantissa * (2.0 ** exponent)
+
+
+def real48(exponent: int, fraction: int, negative: bool) -> bytes:
+    """
+    Байты Real48 из экспоненты (байт 0), 39-битной дробной части мантиссы и знака
+    """
+    return (exponent | fraction << 8 | (1 << 47 if negative else 0)).to_bytes(REAL48_SIZE, "little")
+
+
+def bits(value: float) -> bytes:
+    return struct.pack("<d", value)
+
+
+def random_samples(exponents: range) -> list[bytes]:
+    """
+    Для каждой экспоненты - крайние и случайные мантиссы обоих знаков
+    """
+    rng = random.Random(SEED)
+    samples = []
+    for exponent in exponents:
+        fractions = [0, 1, (1 << 39) - 1] + [rng.getrandbits(39) for _ in range(MANTISSAS_PER_EXPONENT)]
+        for fraction in fractions:
+            samples.append(real48(exponent, fraction, False))
+            samples.append(real48(exponent, fraction, True))
+    return samples
+
+
+NONZERO_SAMPLES = random_samples(range(1, 256))
+ZERO_EXPONENT_SAMPLES = random_samples(range(0, 1))
+
+
+@pytest.mark.parametrize("exponent", range(1, 256))
+def test_encode_decode_roundtrip(exponent):
+    for sample in random_samples(range(exponent, exponent + 1)):
+        assert encode_real48(decode_real48(sample)) == sample
+
+
+def test_zero():
+    assert decode_real48(bytes(REAL48_SIZE)) == 0.0
+    assert encode_real48(0.0) == bytes(REAL48_SIZE)
+    assert encode_real48(-0.0) == bytes(REAL48_SIZE)
+
+
+def test_zero_exponent_is_zero():
+    # при экспоненте 0 число равно 0 независимо от мантиссы и знака (положительный ноль, как в parse_real48)
+    for sample in ZERO_EXPONENT_SAMPLES:
+        assert bits(decode_real48(sample)) == bits(0.0)
+        assert encode_real48(decode_real48(sample)) == bytes(REAL48_SIZE)
+    column = decode_real48_column(b"".join(ZERO_EXPONENT_SAMPLES), 0, REAL48_SIZE, len(ZERO_EXPONENT_SAMPLES))
+    assert column.tobytes() == bytes(8 * len(ZERO_EXPONENT_SAMPLES))
+
+
+def test_decode_matches_legacy():
+    for sample in NONZERO_SAMPLES + ZERO_EXPONENT_SAMPLES:
+        assert bits(decode_real48(sample)) == bits(legacy_parse_real48(sample)), sample.hex()
+
+
+def test_batch_decode_matches_legacy():
+    samples = NONZERO_SAMPLES + ZERO_EXPONENT_SAMPLES
+    expected = b"".join(bits(legacy_parse_real48(sample)) for sample in samples)
+    assert decode_real48_many(samples).tobytes() == expected
+
+    # столбец: числа внутри записей длиной 11 байт со смещением 3 (как поле Real48 записи K)
+    stride = 11
+    data = b"".join(b"\xAA" * 3 + sample + b"\x55" * (stride - 3 - REAL48_SIZE) for sample in samples)
+    assert decode_real48_column(data, 3, stride, len(samples)).tobytes() == expected
+    assert decode_real48_column(memoryview(data), 3, stride, len(samples)).tobytes() == expected
+    assert len(decode_real48_column(data, 3, stride, 0)) == 0
+
+
+def test_decode_rejects_wrong_length():
+    with pytest.raises(ValueError):
+        decode_real48(bytes(5))
@@ -0,0 +1,62 @@
+"""
+Проверки учета отсеков (section_ledger): энерговыделение отсека, из которого вывезены все ТВС, - ровно 0.0,
+без погрешности округления от вычитания кривых.
+"""
+import random
+from datetime import datetime
+
+import pytest
+
+from classes import TVS
+from constants import EXPOSURE_DAYS
+from heat_engine import curve_breakpoints, get_heat_curve
+from section_ledger import SectionLedger
+
+AZ_MOST = 1
+B03_MOST = 43
+DATE = datetime(2025, 11, 20)
+
+
+class Assembly:
+    """
+    ТВС без записи ТОПАЗ: номер и координаты (отсек - как у TVS)
+    """
+
+    def __init__(self, number: str, most: int, tel: int):
+        self.number = number
+        self.most = most
+        self.tel = tel
+
+    def get_section(self):
+        return TVS.section_by_most(self.most)
+
+
+def make_ledger(count: int = 150) -> SectionLedger:
+    rng = random.Random(3)
+    tvs_hash = {}
+    breakpoints = {}
+    for i in range(count):
+        number = f"{i:03}"
+        tvs_hash[number] = Assembly(number, AZ_MOST, i)
+        heat_data = sorted((rng.uniform(0.01, 20.0) for _ in EXPOSURE_DAYS), reverse=True)
+        end_day = DATE.toordinal() - rng.randint(1, 3000)
+        breakpoints[number] = curve_breakpoints(get_heat_curve(heat_data), end_day)
+    return SectionLedger(tvs_hash, breakpoints)
+
+
+def test_emptied_section_heat_is_exact_zero():
+    ledger = make_ledger()
+    assert ledger.heat("az", DATE) > 0.0
+
+    for number in list(ledger.members["az"]):
+        ledger.move(number, B03_MOST, int(number))
+
+    assert ledger.count("az") == 0
+    assert ledger.heat("az", DATE) == 0.0
+    assert str(round(ledger.heat("az", DATE), 1)) == "0.0"
+
+    # отсек снова заполняется с нуля, без остатка от прежних кривых
+    number = "000"
+    ledger.move(number, AZ_MOST, 0)
+    single = SectionLedger({number: ledger.tvs_hash[number]}, {number: ledger.breakpoints[number]})
+    assert ledger.heat("az", DATE) == pytest.approx(single.heat("az", DATE), rel=1e-12)
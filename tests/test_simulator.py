@@ -0,0 +1,109 @@
+"""
+Проверки суточной справки событийного моделирования (simulator): состав отсеков на конец суток
+определяется точным временем завершения каждой перестановки, а не суточными квотами прежнего цикла по дням.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from classes import TVS
+from error import CheckpointMismatchError
+from section_ledger import SectionLedger
+from services import Permutation
+from simulator import Simulator, permutation_events
+
+AZ_MOST = 1
+B01_MOST = 60
+
+# этап 5: 30.11 10:00 - 03.12 12:00 (74 ч), 50 перестановок => t = ceil(266400 / 50) = 5328 с
+STAGE_BEGIN = datetime(2025, 11, 30, 10)
+STAGE_END = datetime(2025, 12, 3, 12)
+PERMUTATIONS_COUNT = 50
+
+
+class Assembly:
+    """
+    ТВС без записи ТОПАЗ: номер и координаты (отсек - как у TVS)
+    """
+
+    def __init__(self, number: str, most: int, tel: int):
+        self.number = number
+        self.most = most
+        self.tel = tel
+
+    def get_section(self):
+        return TVS.section_by_most(self.most)
+
+
+def make_pool():
+    return {f"{i:03}": Assembly(f"{i:03}", B01_MOST, i) for i in range(PERMUTATIONS_COUNT)}
+
+
+def make_simulator(events, tvs_hash=None):
+    tvs_hash = make_pool() if tvs_hash is None else tvs_hash
+    ledger = SectionLedger(tvs_hash, {number: [] for number in tvs_hash})
+    return Simulator(ledger, events)
+
+
+def stage_5_events(order=None):
+    order = range(PERMUTATIONS_COUNT) if order is None else order
+    permutations = [Permutation(f"{i:03}", AZ_MOST, i) for i in order]
+    return permutation_events("stage_5", permutations, STAGE_BEGIN, STAGE_END, 1)
+
+
+def test_events_complete_at_exact_times():
+    events = list(stage_5_events())
+    assert [event.index for event in events] == list(range(PERMUTATIONS_COUNT))
+    assert events[0].time == STAGE_BEGIN + timedelta(seconds=5328)
+    assert events[24].time == STAGE_BEGIN + timedelta(seconds=25 * 5328)
+    # последняя перестановка приводится к концу этапа
+    assert events[-1].time == STAGE_END
+
+
+def test_daily_counts_follow_event_times():
+    report_dates = [STAGE_BEGIN.replace(hour=0) + timedelta(days=i) for i in range(5)]
+    days = make_simulator(stage_5_events()).daily_report(report_dates)
+
+    # строка суток - перестановки, завершившиеся до полуночи: ceil(время от начала этапа / t) - 1 (не больше 50).
+    # Прежний цикл по дням давал 9, 26, 43, 50: квота середины этапа ceil(86400 / 5328) = 17 вместо 16.2
+    # в сутки, поэтому он опережал расписание на 1 ТВС 01.12 и на 2 ТВС 02.12; итог этапа тот же
+    loaded = [9, 25, 41, 50, 50]
+    assert [day.count_az for day in days] == loaded
+    assert [day.count_b01 for day in days] == [PERMUTATIONS_COUNT - count for count in loaded]
+
+
+def test_event_at_midnight_belongs_to_next_day():
+    # 24 перестановки за 24 ч: k-я завершается ровно в (k + 1) ч, последняя - ровно в полночь
+    begin = datetime(2025, 12, 1)
+    permutations = [Permutation(f"{i:03}", AZ_MOST, i) for i in range(24)]
+    events = permutation_events("stage_5", permutations, begin, begin + timedelta(days=1), 1)
+    days = make_simulator(events).daily_report([begin, begin + timedelta(days=1)])
+    assert [day.count_az for day in days] == [23, 24]
+
+
+def test_resume_checks_consumed_events():
+    report_dates = [STAGE_BEGIN.replace(hour=0) + timedelta(days=i) for i in range(5)]
+    tvs_hash = make_pool()
+    simulator = make_simulator(stage_5_events(), tvs_hash)
+    full = simulator.run(report_dates, checkpoint_dates=[report_dates[1]])[0]
+    checkpoint = simulator.checkpoints[report_dates[1]]
+    breakpoints = {number: [] for number in tvs_hash}
+
+    resumed = Simulator.resume(checkpoint, tvs_hash, stage_5_events(), breakpoints).daily_report(report_dates[2:])
+    assert resumed == full
+
+    # перестановки до точки в другом порядке
+    swapped = [1, 0, *range(2, PERMUTATIONS_COUNT)]
+    with pytest.raises(CheckpointMismatchError):
+        Simulator.resume(checkpoint, tvs_hash, stage_5_events(swapped), breakpoints)
+
+    # этап сдвинут: до точки завершается другое число перестановок
+    shifted = permutation_events(
+        "stage_5",
+        [Permutation(f"{i:03}", AZ_MOST, i) for i in range(PERMUTATIONS_COUNT)],
+        STAGE_BEGIN + timedelta(hours=6),
+        STAGE_END,
+        1
+    )
+    with pytest.raises(CheckpointMismatchError):
+        Simulator.resume(checkpoint, tvs_hash, shifted, breakpoints)
@@ -1,66 +1,154 @@
 """
 В данном модуле представлены методы для парсинга файла БД ТОПАЗа.
 """
+import mmap
 import os.path
+from concurrent.futures import ProcessPoolExecutor
+from array import array
 from datetime import datetime
-from typing import Optional
+from operator import attrgetter
+from typing import Generator, Optional
 
-from classes import TVS, K
+from cache import file_digest, load_cache, save_cache
+from classes import TVS, K, K_REAL48_LAYOUT
 from error import CustomFileNotFound
+from real48_codec import decode_real48_column
 
 
-def read_topaz(file_path, chunk_size):
+# минимальное число записей файла ТОПАЗ, начиная с которого расшифровка распараллеливается
+PARALLEL_MIN_RECORDS = 5000
+
+
+def decode_real48_columns(raw_pool: list[K]) -> dict[str, array]:
     """
-    Считывает файл ТОПАЗ, производя байтовый парсинг (декодирование и изменение не производятся здесь!)
-    :return: list[K]
+    Расшифровывает все поля Real48 всех записей пула сразу: записи собираются в один буфер,
+    каждое поле - один проход по буферу с шагом в размер записи (см. real48_codec.decode_real48_column)
+    :param raw_pool: list[K] - пул ТВС в байтовом виде
+    :return: dict[имя поля из K_REAL48_LAYOUT, array('d') значений по записям пула]
+    """
+    data = b"".join(map(attrgetter("chunk"), raw_pool))
+    stride = len(raw_pool[0].chunk) if raw_pool else 0
+    return {
+        name: decode_real48_column(data, offset, stride, len(raw_pool)) for name, offset in K_REAL48_LAYOUT.items()
+    }
+
+
+class Real48Row:
+    """
+    Значения полей Real48 одной записи пула из результата decode_real48_columns (без копирования)
     """
 
+    def __init__(self, columns: dict[str, array], index: int):
+        self.columns = columns
+        self.index = index
+
+    def __getitem__(self, name: str) -> float:
+        return self.columns[name][self.index]
+
+
+def map_topaz(file_path) -> memoryview:
+    """
+    Отображает файл ТОПАЗ в память (только чтение)
+    :return: memoryview всего файла (пустой для пустого файла)
+    """
     try:
         file_size = os.path.getsize(file_path)  # размер файла
     except FileNotFoundError:
         raise CustomFileNotFound(file_path)
 
+    if file_size == 0:
+        # пустой файл невозможно отобразить в память
+        return memoryview(b"")
+
+    with open(file_path, "rb") as inp:
+        # отображение остается доступным после закрытия файла, пока на него ссылаются представления
+        return memoryview(mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def report_tail(tail: memoryview):
+    """
+    Сообщает о нераспределенном остатке файла ТОПАЗ (байтах, не вошедших ни в одну запись)
+    """
+    if len(tail) != 0:
+        print(f"Файл ТОПАЗ считан не полностью, осталось {len(tail)} нераспределенных байт.")
+        print(f"Вывод нераспределенных байт считанного файла ТОПАЗ:\n{bytes(tail)}")
+    else:
+        print("Файл ТОПАЗ считан полностью.")
+
+
+def iter_topaz(
+        file_path,
+        chunk_size,
+        start: int = 0,
+        stop: Optional[int] = None
+) -> Generator[tuple[int, memoryview, K], None, memoryview]:
+    """
+    Последовательно выдает записи файла ТОПАЗ, не накапливая их: память не растет с размером файла.
+    По окончании файла сообщает о нераспределенном остатке (report_tail) и возвращает его как результат генератора.
+    :param file_path: расположение файла ТОПАЗ
+    :param chunk_size: размер записи K в файле
+    :param start: индекс первой выдаваемой записи
+    :param stop: индекс записи, перед которой выдача прекращается (по умолчанию - до конца файла)
+    :return: генератор (индекс записи, байтовая вырезка (memoryview), K)
+    """
+    buffer = map_topaz(file_path)
+    records_count = len(buffer) // chunk_size
+    for i in range(start, records_count if stop is None else min(stop, records_count)):
+        chunk = buffer[i * chunk_size:(i + 1) * chunk_size]
+        yield i, chunk, K(chunk)
+    tail = buffer[records_count * chunk_size:]
+    if stop is None:
+        report_tail(tail)
+    return tail
+
+
+def read_topaz(file_path, chunk_size):
+    """
+    Считывает файл ТОПАЗ, производя байтовый парсинг (декодирование и изменение не производятся здесь!)
+    Файл отображается в память (mmap): chunk-и и сущности K - представления (memoryview) одного и того же буфера,
+    байты записей не копируются и не хранятся дважды.
+    :return: list[memoryview], list[K]
+    """
     # инициализируем 2 пула ТВС
     chunk_pool = []  # сюда помещаем байтовые вырезки (chunks) из оригинального файла
-    k_pool = []  # сюда помещаем сущности k, получившиеся после парсинга chunk-ов в объекты K питоном
+    k_pool = []  # сюда помещаем сущности k - представления chunk-ов в виде объектов K
 
-    with open(file_path, "rb") as inp:
-        while file_size >= chunk_size:
-            chunk = inp.read(chunk_size)
-            k = K(chunk)
-            chunk_pool.append(chunk)
-            k_pool.append(k)
-            file_size -= chunk_size
-        tail = inp.read()
-        if tail != b"":
-            print(f"Файл ТОПАЗ считан не полностью, осталось {len(tail)} нераспределенных байт.")
-            print(f"Вывод нераспределенных байт считанного файла ТОПАЗ:\n{tail}")
-        else:
-            print("Файл ТОПАЗ считан полностью.")
-        return chunk_pool, k_pool
+    for _, chunk, k in iter_topaz(file_path, chunk_size):
+        chunk_pool.append(chunk)
+        k_pool.append(k)
+    return chunk_pool, k_pool
 
 
 def write_topaz_state_file(file_name: str, pool: list[bytes]):
     """
-    Записывает файл ТОПАЗ из переданных ТВС в pool
-    :param pool: список chunk-ов, переданных для записи в файл
+    Записывает файл ТОПАЗ из переданных ТВС в pool.
+    Запись производится во временный файл, который затем замещает `file_name`: так можно перезаписать и файл,
+    отображенный в память функцией `read_topaz`.
+    :param pool: список chunk-ов (bytes или memoryview), переданных для записи в файл
     :param file_name: расположение файла, в который производится запись
     :return: None
     """
-    with open(file_name, "wb") as file:
+    tmp_file_name = f"{file_name}.tmp"
+    with open(tmp_file_name, "wb") as file:
         file.writelines(pool)
+    os.replace(tmp_file_name, file_name)
 
 
 def decode_tvs_pool(
         raw_pool: list[K],
         codepage: str = "cp1251",
-        date: Optional[datetime] = None
+        date: Optional[datetime] = None,
+        lazy: bool = False,
+        real48_columns: Optional[dict[str, array]] = None
 ) -> (dict[str, TVS], dict[str, int]):
     """
     Производит расшифровку пула ТВС в байтовых данных
     :param raw_pool: list[K] - пул ТВС в байтовом виде без расшифровки
     :param codepage: используемая кодировка
     :param date: дата, на которую производится расчет (для расчета остаточного тепловыделения ТВС) - опционально
+    :param lazy: ленивый режим - поля ТВС расшифровываются из записи K при первом обращении к ним
+        (при создании ТВС расшифровывается только номер). Ошибки расшифровки полей возникают при обращении к полю.
+    :param real48_columns: уже расшифрованные поля Real48 пула (см. decode_real48_columns) - опционально
     :return: dict[str, TVS] (dict[номер ТВС, ТВС])
     """
     parsed_pool = {}
@@ -68,10 +156,16 @@ def decode_tvs_pool(
     # необходим для понимания какой номер ТВС на каком месте стоит в сыром списке ТВС
     mapper = {}
 
+    # в обычном режиме поля Real48 расшифровываются для всего пула разом,
+    # в ленивом - каждое поле по отдельности при обращении к нему
+    if real48_columns is None and not lazy:
+        real48_columns = decode_real48_columns(raw_pool)
+
     for i in range(0, len(raw_pool)):
         try:
             k = raw_pool[i]
-            tvs = TVS(k, codepage, date)
+            real48 = None if real48_columns is None else Real48Row(real48_columns, i)
+            tvs = TVS(k, codepage, date, real48, lazy)
         except Exception as exc:
             print("Неудача парсинга ТВС.")
             print(exc)
@@ -79,3 +173,108 @@ def decode_tvs_pool(
             mapper.setdefault(tvs.number, i)
             parsed_pool.setdefault(tvs.number, tvs)
     return parsed_pool, mapper
+
+
+def _decode_records(
+        file_path: str,
+        chunk_size: int,
+        start: int,
+        stop: int,
+        codepage: str,
+        date: Optional[datetime]
+) -> (dict[str, TVS], dict[str, int]):
+    """
+    Расшифровывает записи файла ТОПАЗ с индексами [start, stop) (выполняется в дочернем процессе).
+    Процесс самостоятельно отображает файл в память и собирает ТВС целиком (Real48 и поля записи);
+    в родительский процесс ТВС передаются через pickle уже расшифрованными (TVS.__getstate__, без записи K).
+    :return: dict[str, TVS], dict[str, int] - как у decode_tvs_pool, индексы записей - сквозные по файлу
+    """
+    raw_pool = [k for _, _, k in iter_topaz(file_path, chunk_size, start, stop)]
+    parsed_pool, mapper = decode_tvs_pool(raw_pool, codepage, date)
+    return parsed_pool, {number: start + i for number, i in mapper.items()}
+
+
+def decode_tvs_pool_parallel(
+        file_path: str,
+        chunk_size: int,
+        codepage: str = "cp1251",
+        date: Optional[datetime] = None,
+        workers: Optional[int] = None
+) -> (dict[str, TVS], dict[str, int]):
+    """
+    Считывает и расшифровывает файл ТОПАЗ в нескольких процессах: диапазон записей делится между процессами
+    поровну, каждый процесс собирает ТВС своего диапазона, текущий процесс только объединяет части.
+    Результат совпадает с read_topaz + decode_tvs_pool, в т.ч. при повторе номера ТВС в файле
+    остается первая по порядку запись.
+    Небольшие файлы (менее PARALLEL_MIN_RECORDS записей) расшифровываются в текущем процессе:
+    запуск процессов обходится дороже самой расшифровки.
+    :param file_path: расположение файла ТОПАЗ
+    :param chunk_size: размер записи K в файле
+    :param codepage: используемая кодировка
+    :param date: дата расчета остаточного тепловыделения ТВС (опционально)
+    :param workers: число процессов (по умолчанию - число ядер)
+    :return: dict[str, TVS], dict[str, int] - как у decode_tvs_pool
+    """
+    buffer = map_topaz(file_path)
+    records_count = len(buffer) // chunk_size
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or records_count < PARALLEL_MIN_RECORDS:
+        del buffer
+        _, raw_pool = read_topaz(file_path, chunk_size)
+        return decode_tvs_pool(raw_pool, codepage, date)
+
+    report_tail(buffer[records_count * chunk_size:])
+    del buffer
+
+    step = -(-records_count // workers)
+    bounds = [(start, min(start + step, records_count)) for start in range(0, records_count, step)]
+
+    parsed_pool = {}
+    mapper = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_decode_records, file_path, chunk_size, start, stop, codepage, date)
+            for start, stop in bounds
+        ]
+        # части объединяются в порядке следования записей: при повторе номера остается первая запись
+        for future in futures:
+            part_pool, part_mapper = future.result()
+            for number, tvs in part_pool.items():
+                mapper.setdefault(number, part_mapper[number])
+                parsed_pool.setdefault(number, tvs)
+    return parsed_pool, mapper
+
+
+def load_tvs_pool(
+        file_path: str,
+        chunk_size: int,
+        codepage: str = "cp1251",
+        cache_path: Optional[str] = None
+) -> (dict[str, TVS], dict[str, int]):
+    """
+    Считывает и расшифровывает файл ТОПАЗ (decode_tvs_pool_parallel), используя дисковый кэш.
+    Кэш привязан к хэшу содержимого файла, размеру записи и кодировке: при их изменении пул расшифровывается заново.
+    Из кэша ТВС загружаются уже расшифрованными (без повторной расшифровки Real48 и разбора дат).
+    :param file_path: расположение файла ТОПАЗ
+    :param chunk_size: размер записи K в файле
+    :param codepage: используемая кодировка
+    :param cache_path: расположение файла кэша (по умолчанию - рядом с файлом ТОПАЗ, с расширением `.cache`)
+    :return: dict[str, TVS], dict[str, int] - как у decode_tvs_pool
+    """
+    if cache_path is None:
+        cache_path = f"{file_path}.cache"
+
+    try:
+        key = (file_digest(file_path), chunk_size, codepage)
+    except FileNotFoundError:
+        raise CustomFileNotFound(file_path)
+
+    cached = load_cache(cache_path, key)
+    if cached is not None:
+        print("Расшифрованный пул ТВС загружен из кэша.")
+        return cached
+
+    tvs_pool, mapper = decode_tvs_pool_parallel(file_path, chunk_size, codepage)
+    save_cache(cache_path, key, (tvs_pool, mapper))
+    return tvs_pool, mapper